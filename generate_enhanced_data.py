@@ -4,11 +4,22 @@
 使用UCSC已知基因的真实坐标信息
 """
 
+import sys
 import pandas as pd
 import numpy as np
 from pathlib import Path
 import logging
 
+# 共用的BED写出函数位于scripts/site_io.py
+sys.path.insert(0, str(Path(__file__).resolve().parent / "scripts"))
+from site_io import write_bed
+
+try:
+    import numexpr as ne
+    HAS_NUMEXPR = True
+except ImportError:
+    HAS_NUMEXPR = False
+
 logging.basicConfig(level=logging.INFO, format='%(message)s')
 logger = logging.getLogger(__name__)
 
@@ -43,6 +54,21 @@ REAL_GENES = [
     # ... 更多基因
 ]
 
+# 基因坐标按列存储为NumPy数组（模块加载时转换一次）
+GENE_STARTS = np.array([g['start'] for g in REAL_GENES], dtype=np.int64)
+GENE_ENDS = np.array([g['end'] for g in REAL_GENES], dtype=np.int64)
+GENE_CHROMS = np.array([g['chrom'] for g in REAL_GENES], dtype=object)
+GENE_IS_PLUS = np.array([g['strand'] == '+' for g in REAL_GENES])
+
+# 各区域采样范围在[start, utr5_end, cds_end, end]中的下标，按[区域, 是否正链]索引
+# 正链5'UTR与负链3'UTR位于基因起始坐标一侧，其余UTR位于末端一侧
+REGION_LO_IDX = np.array([[2, 0],   # 5'UTR
+                          [1, 1],   # CDS
+                          [0, 2]])  # 3'UTR
+REGION_HI_IDX = np.array([[3, 1],
+                          [2, 2],
+                          [1, 3]])
+
 def generate_realistic_bed(num_sites=5000, mod_type='psi', seed=42):
     """
     生成基于真实基因坐标的高质量BED数据
@@ -52,12 +78,9 @@ def generate_realistic_bed(num_sites=5000, mod_type='psi', seed=42):
     - mod_type: 'psi' 或 'm6a'
     - seed: 随机种子
     """
-    np.random.seed(seed)
+    rng = np.random.default_rng(seed)
     logger.info(f"生成真实的{mod_type.upper()}数据 ({num_sites}个位点)...")
 
-    # 扩展基因列表（重复使用以获得更多基因）
-    genes = REAL_GENES * 2000  # 复制2000次
-
     # 根据修饰类型设置分布特征
     if mod_type == 'm6a':
         # m6A: 3'UTR偏好 (60%), CDS (30%), 5'UTR (10%)
@@ -66,81 +89,60 @@ def generate_realistic_bed(num_sites=5000, mod_type='psi', seed=42):
         # Ψ: 相对均匀分布
         region_probs = {'utr5': 0.20, 'cds': 0.50, 'utr3': 0.30}
 
-    sites = []
-
-    for i in range(num_sites):
-        # 随机选择一个基因
-        gene = genes[np.random.randint(0, len(genes))]
-
-        # 计算基因结构
-        gene_length = gene['end'] - gene['start']
-        utr5_length = int(gene_length * 0.2)
-        cds_length = int(gene_length * 0.6)
-        utr3_length = gene_length - utr5_length - cds_length
-
-        if gene['strand'] == '+':
-            utr5_end = gene['start'] + utr5_length
-            cds_end = utr5_end + cds_length
-        else:
-            utr5_end = gene['end'] - utr3_length - cds_length
-            cds_end = utr5_end + cds_length
-
-        # 选择区域
-        region = np.random.choice(['utr5', 'cds', 'utr3'], p=[region_probs['utr5'],
-                                                              region_probs['cds'],
-                                                              region_probs['utr3']])
-
-        if region == 'utr5':
-            if gene['strand'] == '+':
-                pos = np.random.randint(gene['start'], utr5_end)
-            else:
-                pos = np.random.randint(cds_end, gene['end'])
-            feature = '5UTR'
-        elif region == 'cds':
-            if gene['strand'] == '+':
-                cds_start = utr5_end
-                cds_end_real = cds_end
-            else:
-                cds_start = utr5_end
-                cds_end_real = cds_end
-            pos = np.random.randint(cds_start, min(cds_end_real, cds_start + cds_length))
-            feature = 'CDS'
-        else:  # utr3
-            if gene['strand'] == '+':
-                pos = np.random.randint(cds_end, gene['end'])
-            else:
-                pos = np.random.randint(gene['start'], utr5_end)
-            feature = '3UTR'
-
-        # 计算相对位置
-        relative_pos = (pos - gene['start']) / gene_length
-
-        sites.append({
-            'chrom': gene['chrom'],
-            'start': pos,
-            'end': pos + 1,
-            'name': f'{mod_type.upper()}_site_{i}',
-            'score': np.random.randint(150, 1000),  # 高质量位点
-            'strand': gene['strand'],
-            'feature': feature,
-            'relative_pos': relative_pos
-        })
-
-    df = pd.DataFrame(sites)
+    # 一次性随机选择所有位点所在的基因
+    gene_idx = rng.integers(0, len(GENE_STARTS), num_sites)
+    start = GENE_STARTS[gene_idx]
+    end = GENE_ENDS[gene_idx]
+    is_plus = GENE_IS_PLUS[gene_idx]
+
+    # 计算基因结构（正负链的utr5_end/cds_end坐标相同）
+    gene_length = end - start
+    utr5_end = start + (gene_length * 0.2).astype(np.int64)
+    cds_end = utr5_end + (gene_length * 0.6).astype(np.int64)
+
+    # 选择区域：0=5'UTR, 1=CDS, 2=3'UTR
+    region = rng.choice(3, size=num_sites, p=[region_probs['utr5'],
+                                               region_probs['cds'],
+                                               region_probs['utr3']])
+
+    # 查表得到每个位点的采样范围
+    bounds = [start, utr5_end, cds_end, end]
+    lo = np.choose(REGION_LO_IDX[region, is_plus.astype(np.int64)], bounds)
+    hi = np.choose(REGION_HI_IDX[region, is_plus.astype(np.int64)], bounds)
+
+    rnd = rng.random(num_sites)
+    if HAS_NUMEXPR:
+        pos = lo + ne.evaluate("rnd * (hi - lo)").astype(np.int64)
+        relative_pos = ne.evaluate("(pos - start) / gene_length")
+    else:
+        pos = lo + (rnd * (hi - lo)).astype(np.int64)
+        relative_pos = (pos - start) / gene_length
+
+    df = pd.DataFrame({
+        'chrom': pd.Categorical(GENE_CHROMS[gene_idx]),
+        'start': pos,
+        'end': pos + 1,
+        'name': [f'{mod_type.upper()}_site_{i}' for i in range(num_sites)],
+        'score': rng.integers(150, 1000, num_sites).astype(np.int32),  # 高质量位点
+        'strand': pd.Categorical.from_codes(np.where(is_plus, 0, 1), ['+', '-']),
+        'feature': pd.Categorical.from_codes(region, ['5UTR', 'CDS', '3UTR']),
+        'relative_pos': relative_pos
+    }, copy=False)
 
     # 保存BED文件
     bed_data = df[['chrom', 'start', 'end', 'name', 'score', 'strand']]
     output_file = Path(__file__).parent.parent / 'data' / f'{mod_type}_HEK293T_realistic.bed'
-    bed_data.to_csv(output_file, sep='\t', header=False, index=False)
+    write_bed(bed_data, output_file)
 
     # 保存完整注释
     output_csv = Path(__file__).parent.parent / 'results' / f'{mod_type}_sites_annotated.csv'
     df.to_csv(output_csv, index=False)
 
     logger.info(f"  保存到: {output_file}")
-    logger.info(f"  位点分布: CDS={sum(df['feature']=='CDS')}, "
-               f"5'UTR={sum(df['feature']=='5UTR')}, "
-               f"3'UTR={sum(df['feature']=='3UTR')}")
+    feature_counts = df['feature'].value_counts()
+    logger.info(f"  位点分布: CDS={feature_counts['CDS']}, "
+               f"5'UTR={feature_counts['5UTR']}, "
+               f"3'UTR={feature_counts['3UTR']}")
 
     return df
 
@@ -4,41 +4,100 @@
 运行所有Python模块并生成最终报告
 """
 
-import os
 import sys
+import csv
+from collections import Counter
 from pathlib import Path
-import pandas as pd
 import subprocess
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
 PROJECT_DIR = Path(__file__).parent
+SCRIPTS_DIR = PROJECT_DIR / "scripts"
 RESULTS_DIR = PROJECT_DIR / "results"
 FIGURES_DIR = PROJECT_DIR / "figures"
 
+# 分析步骤及其依赖关系：名称 -> (编号, 描述, 脚本, 依赖步骤)
+# metagene和venn只依赖数据获取，可以并行运行
+PIPELINE_STEPS = {
+    'fetch': ("[1/4]", "数据获取", "1_data_fetching.py", []),
+    'metagene': ("[2/4]", "Metagene Profile分析", "3_metagene_profile.py", ['fetch']),
+    'venn': ("[3/4]", "共定位分析", "4_venn_analysis.py", ['fetch']),
+}
+
+
+def run_step(script):
+    """在conda环境中运行单个分析脚本（不经过shell）"""
+    subprocess.run(["conda", "run", "-n", "rna_modif_analysis", "python", script],
+                   cwd=SCRIPTS_DIR, stdout=subprocess.DEVNULL,
+                   stderr=subprocess.DEVNULL, check=True)
+
+
+def run_pipeline(steps):
+    """按依赖顺序提交各步骤，依赖已满足的步骤并行运行"""
+    pending = dict(steps)
+    done, failed = set(), set()
+    running = {}
+
+    with ThreadPoolExecutor(max_workers=len(steps)) as pool:
+        while pending or running:
+            for name, (label, desc, script, deps) in list(pending.items()):
+                if any(dep in failed for dep in deps):
+                    print(f"\n{label} {desc}... 跳过（依赖步骤失败）")
+                    failed.add(name)
+                    del pending[name]
+                elif all(dep in done for dep in deps):
+                    print(f"\n{label} {desc}...")
+                    running[pool.submit(run_step, script)] = name
+                    del pending[name]
+
+            if not running:
+                break
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                desc = steps[name][1]
+                try:
+                    future.result()
+                    done.add(name)
+                    print(f"✓ {desc}完成")
+                except (subprocess.CalledProcessError, OSError) as e:
+                    failed.add(name)
+                    print(f"✗ {desc}失败: {e}")
+
+
+def summarize_sites(csv_path):
+    """
+    流式统计注释文件：返回(位点数, 特征计数Counter, 各特征百分比, 平均相对位置)
+    """
+    counts = Counter()
+    relative_pos_sum = 0.0
+    n_sites = 0
+
+    with open(csv_path, newline='') as f:
+        for row in csv.DictReader(f):
+            counts[row['feature']] += 1
+            relative_pos_sum += float(row['relative_pos'])
+            n_sites += 1
+
+    n = max(n_sites, 1)
+    percents = Counter({feature: count / n * 100 for feature, count in counts.items()})
+    return n_sites, counts, percents, relative_pos_sum / n
+
+
 print("="*80)
 print("RNA修饰比较分析 - 完整分析流程")
 print("="*80)
 
-# 1. 数据获取
-print("\n[1/4] 数据获取...")
-os.system("cd scripts && conda run -n rna_modif_analysis python 1_data_fetching.py > /dev/null 2>&1")
-print("✓ 数据获取完成")
-
-# 2. Metagene Profile
-print("\n[2/4] Metagene Profile分析...")
-os.system("cd scripts && conda run -n rna_modif_analysis python 3_metagene_profile.py > /dev/null 2>&1")
-print("✓ Metagene Profile分析完成")
-
-# 3. 韦恩图分析
-print("\n[3/4] 共定位分析...")
-os.system("cd scripts && conda run -n rna_modif_analysis python 4_venn_analysis.py > /dev/null 2>&1")
-print("✓ 共定位分析完成")
+# 1-3. 数据获取、Metagene Profile、共定位分析
+run_pipeline(PIPELINE_STEPS)
 
 # 4. 生成汇总报告
 print("\n[4/4] 生成汇总报告...")
 
 # 读取数据
-psi_df = pd.read_csv(RESULTS_DIR / "psi_sites_annotated.csv")
-m6a_df = pd.read_csv(RESULTS_DIR / "m6a_sites_annotated.csv")
+n_psi, psi_counts, psi_pct, psi_mean_pos = summarize_sites(RESULTS_DIR / "psi_sites_annotated.csv")
+n_m6a, m6a_counts, m6a_pct, m6a_mean_pos = summarize_sites(RESULTS_DIR / "m6a_sites_annotated.csv")
 
 # 生成报告
 report = f"""
@@ -55,24 +114,24 @@ RNA修饰比较分析 - 最终报告
 {'='*80}
 
 Pseudouridine (Ψ):
-  总位点数: {len(psi_df):,}
-  - 5'UTR: {sum(psi_df['feature']=='5UTR'):,} ({sum(psi_df['feature']=='5UTR')/len(psi_df)*100:.1f}%)
-  - CDS: {sum(psi_df['feature']=='CDS'):,} ({sum(psi_df['feature']=='CDS')/len(psi_df)*100:.1f}%)
-  - 3'UTR: {sum(psi_df['feature']=='3UTR'):,} ({sum(psi_df['feature']=='3UTR')/len(psi_df)*100:.1f}%)
+  总位点数: {n_psi:,}
+  - 5'UTR: {psi_counts['5UTR']:,} ({psi_pct['5UTR']:.1f}%)
+  - CDS: {psi_counts['CDS']:,} ({psi_pct['CDS']:.1f}%)
+  - 3'UTR: {psi_counts['3UTR']:,} ({psi_pct['3UTR']:.1f}%)
 
 m6A:
-  总位点数: {len(m6a_df):,}
-  - 5'UTR: {sum(m6a_df['feature']=='5UTR'):,} ({sum(m6a_df['feature']=='5UTR')/len(m6a_df)*100:.1f}%)
-  - CDS: {sum(m6a_df['feature']=='CDS'):,} ({sum(m6a_df['feature']=='CDS')/len(m6a_df)*100:.1f}%)
-  - 3'UTR: {sum(m6a_df['feature']=='3UTR'):,} ({sum(m6a_df['feature']=='3UTR')/len(m6a_df)*100:.1f}%)
+  总位点数: {n_m6a:,}
+  - 5'UTR: {m6a_counts['5UTR']:,} ({m6a_pct['5UTR']:.1f}%)
+  - CDS: {m6a_counts['CDS']:,} ({m6a_pct['CDS']:.1f}%)
+  - 3'UTR: {m6a_counts['3UTR']:,} ({m6a_pct['3UTR']:.1f}%)
 
 {'='*80}
 二、主要发现
 {'='*80}
 
 1. 空间分布差异极显著
-   - m6A强烈富集在3'UTR区域({sum(m6a_df['feature']=='3UTR')/len(m6a_df)*100:.1f}%)
-   - Ψ在CDS区域分布更广泛({sum(psi_df['feature']=='CDS')/len(psi_df)*100:.1f}%)
+   - m6A强烈富集在3'UTR区域({m6a_pct['3UTR']:.1f}%)
+   - Ψ在CDS区域分布更广泛({psi_pct['CDS']:.1f}%)
    - 统计显著性: P < 0.001 (卡方检验和KS检验)
 
 2. 共定位分析
@@ -80,8 +139,8 @@ m6A:
    - 提示两种修饰可能存在独立的功能机制
 
 3. Metagene Profile
-   - m6A平均相对位置: {m6a_df['relative_pos'].mean():.3f} (偏向3'端)
-   - Ψ平均相对位置: {psi_df['relative_pos'].mean():.3f} (相对均匀)
+   - m6A平均相对位置: {m6a_mean_pos:.3f} (偏向3'端)
+   - Ψ平均相对位置: {psi_mean_pos:.3f} (相对均匀)
    - m6A在终止密码子附近(~80%)有明显峰值
 
 {'='*80}
@@ -17,6 +17,14 @@ import numpy as np
 from pathlib import Path
 import logging
 
+from site_io import write_bed
+
+try:
+    import numexpr as ne
+    HAS_NUMEXPR = True
+except ImportError:
+    HAS_NUMEXPR = False
+
 # 配置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -30,6 +38,9 @@ RESULTS_DIR = PROJECT_DIR / "results"
 DATA_DIR.mkdir(exist_ok=True)
 RESULTS_DIR.mkdir(exist_ok=True)
 
+# 模拟数据使用的染色体名称（chr1-chr22），按编号0-21索引
+CHROM_TABLE = np.array([f"chr{i}" for i in range(1, 23)], dtype=object)
+
 
 def run_command(command, description=""):
     """
@@ -37,7 +48,9 @@ def run_command(command, description=""):
     """
     try:
         logger.info(f"执行: {description or command}")
-        result = subprocess.run(command, shell=True, check=True, capture_output=True, text=True)
+        # 标准输出直接丢弃，只保留stderr用于报错（避免大文件下载时在内存中缓存输出）
+        subprocess.run(command, shell=True, check=True, stdout=subprocess.DEVNULL,
+                       stderr=subprocess.PIPE, text=True)
         logger.info(f"成功: {description or command}")
         return True
     except subprocess.CalledProcessError as e:
@@ -70,7 +83,7 @@ def download_real_data():
 
     logger.info("\n[1/3] 下载GENCODE hg38 GTF文件...")
     if not gtf_path.exists():
-        cmd = f"wget -c -O {gtf_path} {gtf_url}"
+        cmd = f"wget -c -nv -O {gtf_path} {gtf_url}"
         run_command(cmd, f"下载GENCODE GTF ({gtf_url})")
     else:
         logger.info(f"文件已存在: {gtf_path}")
@@ -112,6 +125,91 @@ def download_real_data():
 # 第二部分：模拟数据生成
 # ==============================================================================
 
+def _build_gene_table(num_genes, genome_size, rng):
+    """
+    生成模拟基因结构表（Ψ和m6A共用）
+
+    参数：
+    - num_genes: 基因数量
+    - genome_size: 模拟基因组大小（Mb）
+    - rng: numpy随机数生成器
+
+    返回：
+    - dict，每个键对应一个NumPy数组
+    """
+    chrom_code = rng.integers(0, len(CHROM_TABLE), num_genes)  # CHROM_TABLE索引
+    gene_start = rng.integers(1000000, genome_size * 1000000 - 100000, num_genes)
+    gene_length = rng.integers(1000, 100000, num_genes)  # 基因长度
+
+    # 基因结构：CDS占60%，5'UTR占20%，3'UTR占20%
+    utr5_length = (gene_length * 0.2).astype(np.int64)
+    cds_length = (gene_length * 0.6).astype(np.int64)
+
+    return {
+        'chrom_code': chrom_code,
+        'gene_start': gene_start,
+        'gene_end': gene_start + gene_length,
+        'utr5_end': gene_start + utr5_length,
+        'cds_end': gene_start + utr5_length + cds_length,
+        'gene_length': gene_length
+    }
+
+
+def _sample_sites(genes, num_sites, region_probs, rng, name_prefix, cds_bias=0.0):
+    """
+    在基因结构上随机生成修饰位点
+
+    参数：
+    - genes: _build_gene_table返回的基因表
+    - num_sites: 位点数量
+    - region_probs: 各区域概率，如 {'utr5': 0.2, 'cds': 0.5, 'utr3': 0.3}
+    - rng: numpy随机数生成器
+    - name_prefix: 位点名称前缀（如'PSI'）
+    - cds_bias: CDS内位点起点偏移比例（0-1），越大越靠近终止密码子
+
+    返回：
+    - 位点DataFrame
+    """
+    # 一次性随机选择所有位点所在的基因
+    idx = rng.integers(0, len(genes['gene_start']), num_sites)
+    gene_start = genes['gene_start'][idx]
+    gene_end = genes['gene_end'][idx]
+    utr5_end = genes['utr5_end'][idx]
+    cds_end = genes['cds_end'][idx]
+
+    # 区域编码：0=5'UTR, 1=CDS, 2=3'UTR
+    region_choice = rng.choice(3, size=num_sites, p=[region_probs['utr5'],
+                                                      region_probs['cds'],
+                                                      region_probs['utr3']])
+
+    # CDS起点按cds_bias偏移，同时确保不会产生空范围
+    cds_biased = utr5_end + (cds_end - utr5_end) * cds_bias
+    cds_lo = np.where(cds_end > cds_biased, cds_biased.astype(np.int64), utr5_end)
+
+    lo = np.choose(region_choice, [gene_start, cds_lo, cds_end])
+    hi = np.choose(region_choice, [utr5_end, cds_end, gene_end])
+    rnd = rng.random(num_sites)
+    gene_length = genes['gene_length'][idx]
+    if HAS_NUMEXPR:
+        pos = lo + ne.evaluate("rnd * (hi - lo)").astype(np.int64)
+        # 计算在基因中的相对位置（用于metagene分析）
+        relative_pos = ne.evaluate("(pos - gene_start) / gene_length")
+    else:
+        pos = lo + (rnd * (hi - lo)).astype(np.int64)
+        relative_pos = (pos - gene_start) / gene_length
+
+    return pd.DataFrame({
+        'chrom': pd.Categorical.from_codes(genes['chrom_code'][idx], CHROM_TABLE),
+        'start': pos,
+        'end': pos + 1,
+        'name': [f'{name_prefix}_{i + 1}' for i in range(num_sites)],
+        'score': rng.integers(100, 1000, num_sites).astype(np.int32),  # 可信度评分
+        'strand': pd.Categorical.from_codes(rng.integers(0, 2, num_sites), ['+', '-']),
+        'feature': pd.Categorical.from_codes(region_choice, ['5UTR', 'CDS', '3UTR']),
+        'relative_pos': relative_pos
+    }, copy=False)
+
+
 def generate_mock_psi(num_sites=5000, genome_size=3000, seed=42):
     """
     生成模拟的Pseudouridine (Ψ) 数据
@@ -126,79 +224,26 @@ def generate_mock_psi(num_sites=5000, genome_size=3000, seed=42):
     - genome_size: 模拟基因组大小（Mb）
     - seed: 随机种子
     """
-    np.random.seed(seed)
+    rng = np.random.default_rng(seed)
     logger.info(f"生成模拟Pseudouridine数据 ({num_sites}个位点)...")
 
     # 模拟基因位置（简化：假设有20000个基因，分布在各染色体）
-    num_genes = 20000
-    gene_data = []
-
-    for i in range(num_genes):
-        chrom = f"chr{np.random.randint(1, 23)}"  # chr1-chr22
-        gene_start = np.random.randint(1000000, genome_size * 1000000 - 100000)
-        gene_length = np.random.randint(1000, 100000)  # 基因长度
-
-        # 基因结构：CDS占60%，5'UTR占20%，3'UTR占20%
-        utr5_length = int(gene_length * 0.2)
-        cds_length = int(gene_length * 0.6)
-        utr3_length = gene_length - utr5_length - cds_length
-
-        gene_data.append({
-            'chrom': chrom,
-            'gene_start': gene_start,
-            'gene_end': gene_start + gene_length,
-            'utr5_end': gene_start + utr5_length,
-            'cds_end': gene_start + utr5_length + cds_length,
-            'gene_length': gene_length
-        })
-
-    genes_df = pd.DataFrame(gene_data)
-
-    # 生成Ψ位点（在CDS和UTR中随机分布，但CDS稍多）
-    psi_sites = []
-
-    for _ in range(num_sites):
-        # 随机选择一个基因
-        gene = genes_df.sample(1).iloc[0]
-
-        # Ψ分布特征：CDS 50%, 5'UTR 20%, 3'UTR 30%
-        region_choice = np.random.choice(['utr5', 'cds', 'utr3'], p=[0.2, 0.5, 0.3])
-
-        if region_choice == 'utr5':
-            pos = np.random.randint(gene['gene_start'], gene['utr5_end'])
-            feature = '5UTR'
-        elif region_choice == 'cds':
-            pos = np.random.randint(gene['utr5_end'], gene['cds_end'])
-            feature = 'CDS'
-        else:  # utr3
-            pos = np.random.randint(gene['cds_end'], gene['gene_end'])
-            feature = '3UTR'
+    genes = _build_gene_table(20000, genome_size, rng)
 
-        # 计算在基因中的相对位置（用于metagene分析）
-        relative_pos = (pos - gene['gene_start']) / gene['gene_length']
-
-        psi_sites.append({
-            'chrom': gene['chrom'],
-            'start': pos,
-            'end': pos + 1,
-            'name': f'PSI_{len(psi_sites)+1}',
-            'score': np.random.randint(100, 1000),  # 可信度评分
-            'strand': np.random.choice(['+', '-']),
-            'feature': feature,
-            'relative_pos': relative_pos
-        })
-
-    psi_df = pd.DataFrame(psi_sites)
+    # Ψ分布特征：CDS 50%, 5'UTR 20%, 3'UTR 30%
+    psi_df = _sample_sites(genes, num_sites, {'utr5': 0.2, 'cds': 0.5, 'utr3': 0.3},
+                           rng, 'PSI')
 
     # 保存为BED格式（标准6列BED）
     bed_data = psi_df[['chrom', 'start', 'end', 'name', 'score', 'strand']]
     bed_file = DATA_DIR / "psi_HEK293T_mock.bed"
-    bed_data.to_csv(bed_file, sep='\t', header=False, index=False)
+    write_bed(bed_data, bed_file)
 
     logger.info(f"  保存到: {bed_file}")
-    logger.info(f"  位点分布: CDS={sum(psi_df['feature']=='CDS')}, "
-                f"5'UTR={sum(psi_df['feature']=='5UTR')}, "
-                f"3'UTR={sum(psi_df['feature']=='3UTR')}")
+    feature_counts = psi_df['feature'].value_counts()
+    logger.info(f"  位点分布: CDS={feature_counts['CDS']}, "
+                f"5'UTR={feature_counts['5UTR']}, "
+                f"3'UTR={feature_counts['3UTR']}")
 
     return psi_df
 
@@ -217,85 +262,27 @@ def generate_mock_m6a(num_sites=5000, genome_size=3000, seed=43):
     - genome_size: 模拟基因组大小（Mb）
     - seed: 随机种子
     """
-    np.random.seed(seed)
+    rng = np.random.default_rng(seed)
     logger.info(f"生成模拟m6A数据 ({num_sites}个位点)...")
 
     # 使用相同的基因结构（与Ψ数据一致，便于比较）
-    num_genes = 20000
-    gene_data = []
-
-    for i in range(num_genes):
-        chrom = f"chr{np.random.randint(1, 23)}"
-        gene_start = np.random.randint(1000000, genome_size * 1000000 - 100000)
-        gene_length = np.random.randint(1000, 100000)
-
-        utr5_length = int(gene_length * 0.2)
-        cds_length = int(gene_length * 0.6)
-        utr3_length = gene_length - utr5_length - cds_length
-
-        gene_data.append({
-            'chrom': chrom,
-            'gene_start': gene_start,
-            'gene_end': gene_start + gene_length,
-            'utr5_end': gene_start + utr5_length,
-            'cds_end': gene_start + utr5_length + cds_length,
-            'gene_length': gene_length
-        })
-
-    genes_df = pd.DataFrame(gene_data)
-
-    # 生成m6A位点（强烈偏向3'UTR和终止密码子附近）
-    m6a_sites = []
-
-    for _ in range(num_sites):
-        gene = genes_df.sample(1).iloc[0]
-
-        # m6A分布特征：3'UTR 60%, CDS 30%, 5'UTR 10%
-        region_choice = np.random.choice(['utr5', 'cds', 'utr3'], p=[0.1, 0.3, 0.6])
-
-        if region_choice == 'utr5':
-            pos = np.random.randint(gene['gene_start'], gene['utr5_end'])
-            feature = '5UTR'
-        elif region_choice == 'cds':
-            # 在CDS中，更倾向于靠近3'端（终止密码子附近）
-            cds_start = gene['utr5_end']
-            cds_end = gene['cds_end']
-            cds_length = cds_end - cds_start
-            # 确保不会产生空范围
-            if cds_end > cds_start + cds_length * 0.6:
-                pos = np.random.randint(int(cds_start + cds_length*0.6), cds_end)
-            else:
-                pos = np.random.randint(cds_start, cds_end)
-            feature = 'CDS'
-        else:  # utr3
-            pos = np.random.randint(gene['cds_end'], gene['gene_end'])
-            feature = '3UTR'
-
-        # 计算在基因中的相对位置
-        relative_pos = (pos - gene['gene_start']) / gene['gene_length']
-
-        m6a_sites.append({
-            'chrom': gene['chrom'],
-            'start': pos,
-            'end': pos + 1,
-            'name': f'M6A_{len(m6a_sites)+1}',
-            'score': np.random.randint(100, 1000),
-            'strand': np.random.choice(['+', '-']),
-            'feature': feature,
-            'relative_pos': relative_pos
-        })
-
-    m6a_df = pd.DataFrame(m6a_sites)
+    genes = _build_gene_table(20000, genome_size, rng)
+
+    # m6A分布特征：3'UTR 60%, CDS 30%, 5'UTR 10%
+    # 在CDS中，更倾向于靠近3'端（终止密码子附近）
+    m6a_df = _sample_sites(genes, num_sites, {'utr5': 0.1, 'cds': 0.3, 'utr3': 0.6},
+                           rng, 'M6A', cds_bias=0.6)
 
     # 保存为BED格式
     bed_data = m6a_df[['chrom', 'start', 'end', 'name', 'score', 'strand']]
     bed_file = DATA_DIR / "m6A_HEK293T_mock.bed"
-    bed_data.to_csv(bed_file, sep='\t', header=False, index=False)
+    write_bed(bed_data, bed_file)
 
     logger.info(f"  保存到: {bed_file}")
-    logger.info(f"  位点分布: CDS={sum(m6a_df['feature']=='CDS')}, "
-                f"5'UTR={sum(m6a_df['feature']=='5UTR')}, "
-                f"3'UTR={sum(m6a_df['feature']=='3UTR')}")
+    feature_counts = m6a_df['feature'].value_counts()
+    logger.info(f"  位点分布: CDS={feature_counts['CDS']}, "
+                f"5'UTR={feature_counts['5UTR']}, "
+                f"3'UTR={feature_counts['3UTR']}")
 
     return m6a_df
 
@@ -306,28 +293,35 @@ def generate_mock_genome_fasta(output_file, seed=44):
 
     注意：这只是用于演示，实际分析应使用真实hg38基因组
     """
-    from Bio.Seq import Seq
-    from Bio.SeqRecord import SeqRecord
-    from Bio import SeqIO
-
-    np.random.seed(seed)
+    rng = np.random.default_rng(seed)
     logger.info("生成模拟基因组FASTA文件...")
 
-    records = []
-    for chrom_num in range(1, 23):
-        chrom_name = f"chr{chrom_num}"
-        # 生成300Mb的随机序列（这里只生成1Mb用于演示）
-        seq_length = 1000000
-
-        # 随机序列，但包含一定比例的motif
-        bases = ['A', 'T', 'C', 'G']
-        sequence = ''.join(np.random.choice(bases, seq_length))
-
-        record = SeqRecord(Seq(sequence), id=chrom_name, description=f"Mock chromosome {chrom_num}")
-        records.append(record)
+    # 碱基查找表：随机整数0-3直接映射为ASCII字节
+    base_table = np.frombuffer(b'ATCG', dtype=np.uint8)
+    line_width = 60
 
     output_path = DATA_DIR / output_file
-    SeqIO.write(records, output_path, "fasta")
+    with open(output_path, 'wb') as f:
+        for chrom_num, chrom_name in enumerate(CHROM_TABLE, start=1):
+            # 生成300Mb的随机序列（这里只生成1Mb用于演示）
+            seq_length = 1000000
+
+            # 随机序列，但包含一定比例的motif
+            base_idx = rng.integers(0, 4, seq_length, dtype=np.uint8)
+            seq_bytes = base_table[base_idx]
+
+            # 按60bp换行：整行部分reshape后追加换行符列，剩余部分单独写出
+            n_full = seq_length // line_width
+            lines = np.empty((n_full, line_width + 1), dtype=np.uint8)
+            lines[:, :line_width] = seq_bytes[:n_full * line_width].reshape(n_full, line_width)
+            lines[:, line_width] = ord('\n')
+
+            f.write(f">{chrom_name} Mock chromosome {chrom_num}\n".encode('ascii'))
+            f.write(lines.tobytes())
+            remainder = seq_bytes[n_full * line_width:]
+            if len(remainder):
+                f.write(remainder.tobytes() + b'\n')
+
     logger.info(f"  保存到: {output_path}")
 
 
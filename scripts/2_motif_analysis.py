@@ -9,6 +9,7 @@ Motif分析模块 - RNA修饰比较分析
 依赖：
 - pyfaidx: 用于快速访问FASTA文件
 - logomaker: 用于绘制sequence logo
+- pyahocorasick（可选）: 一次扫描统计多个已知motif
 - pandas, numpy, matplotlib
 
 作者：周子航
@@ -19,10 +20,12 @@ import os
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
+from matplotlib.collections import PatchCollection
+from matplotlib.patches import Rectangle
 import seaborn as sns
 from pathlib import Path
 import logging
-from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from typing import List, Tuple
 import warnings
 warnings.filterwarnings('ignore')
@@ -42,6 +45,18 @@ except ImportError:
     HAS_LOGOMAKER = False
     print("警告: logomaker未安装，将使用matplotlib绘制简单的motif图")
 
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+try:
+    import ahocorasick
+    HAS_AHOCORASICK = True
+except ImportError:
+    HAS_AHOCORASICK = False
+
 # 配置日志和绘图
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -58,6 +73,49 @@ FIGURES_DIR = PROJECT_DIR / "figures"
 
 FIGURES_DIR.mkdir(exist_ok=True)
 
+# 反向互补查找表（未列出的字符保持不变）
+_COMPLEMENT_TRANS = str.maketrans('ACGTUNacgtun', 'TGCAANtgcaan')
+_COMPLEMENT_TABLE = np.arange(256, dtype=np.uint8)
+for _base, _comp in zip(b'ACGTUNacgtun', b'TGCAANtgcaan'):
+    _COMPLEMENT_TABLE[_base] = _comp
+
+# 模拟序列使用的碱基（按随机整数0-3索引）
+_RANDOM_BASES = np.frombuffer(b'AUCG', dtype=np.uint8)
+
+# 碱基编码查找表：A/U/C/G -> 0/1/2/3，其他字符（如N）-> 255
+_BASE_CODE_TABLE = np.full(256, 255, dtype=np.uint8)
+for _code, _base in enumerate(b'AUCG'):
+    _BASE_CODE_TABLE[_base] = _code
+
+
+def _decode_kmer(code: int, k: int) -> str:
+    """
+    将base-4整数编码还原为k-mer字符串（高位在前）
+    """
+    chars = []
+    for _ in range(k):
+        chars.append('AUCG'[code & 3])
+        code >>= 2
+    return ''.join(reversed(chars))
+
+
+if HAS_NUMBA:
+    @njit(cache=True)
+    def _rc_batch_kernel(seqs_u8, out, table):
+        """
+        批量反向互补（numba编译）：seqs_u8为(n, L)的uint8矩阵
+        """
+        n, length = seqs_u8.shape
+        for i in range(n):
+            for j in range(length):
+                out[i, length - 1 - j] = table[seqs_u8[i, j]]
+else:
+    def _rc_batch_kernel(seqs_u8, out, table):
+        """
+        批量反向互补（NumPy实现）：seqs_u8为(n, L)的uint8矩阵
+        """
+        out[:] = table[seqs_u8[:, ::-1]]
+
 
 # ==============================================================================
 # 序列提取功能
@@ -68,23 +126,28 @@ class SequenceExtractor:
     从基因组中提取指定位置的序列
     """
 
-    def __init__(self, fasta_path: str):
+    def __init__(self, fasta_path: str, seed: int = None):
         """
         初始化
 
         参数：
         - fasta_path: 基因组FASTA文件路径
+        - seed: 模拟序列的随机种子（可选）
         """
         self.fasta_path = fasta_path
+        self.rng = np.random.default_rng(seed)
 
         if HAS_PYFAIDX and os.path.exists(fasta_path):
             logger.info(f"加载基因组: {fasta_path}")
             self.genome = Fasta(fasta_path)
             self.has_genome = True
+            # 缓存各染色体记录，同时作为合法染色体名称集合
+            self._chrom_cache = {name: self.genome[name] for name in self.genome.keys()}
         else:
             logger.warning(f"无法加载基因组 {fasta_path}，将使用模拟序列")
             self.has_genome = False
             self.genome = None
+            self._chrom_cache = {}
 
     def extract_sequence(self, chrom: str, start: int, end: int,
                         flank: int = 10, strand: str = '+') -> str:
@@ -102,37 +165,41 @@ class SequenceExtractor:
         - 序列字符串（长度为 2*flank + 1）
         """
         if self.has_genome:
-            try:
-                # 提取序列（包含侧翼区域）
-                seq_start = max(0, start - flank)
-                seq_end = end + flank
-
-                # pyfaidx使用1-based坐标
-                sequence = self.genome[chrom][seq_start:seq_end].seq
-
+            sequence = self._fetch_sequence(chrom, start, end, flank)
+            if sequence is not None:
                 # 如果是负链，需要反向互补
                 if strand == '-':
                     sequence = self._reverse_complement(sequence)
 
                 # 取中心区域（确保长度正确）
-                center = flank
-                seq_extracted = sequence[center-flank:center+flank+1]
+                return sequence[:2*flank + 1].upper()
 
-                return seq_extracted.upper()
+        # 使用模拟序列
+        return self._generate_random_sequence(2*flank + 1)
 
-            except Exception as e:
-                logger.warning(f"提取序列失败: {chrom}:{start}-{end}, 错误: {e}")
-                return self._generate_random_sequence(2*flank + 1)
+    def _fetch_sequence(self, chrom: str, start: int, end: int, flank: int):
+        """
+        从基因组中读取正链序列（包含侧翼区域），失败时返回None
+        """
+        record = self._chrom_cache.get(chrom)
+        if record is None:
+            logger.warning(f"提取序列失败: {chrom}:{start}-{end}, 错误: 基因组中不存在该染色体")
+            return None
 
-        else:
-            # 使用模拟序列
-            return self._generate_random_sequence(2*flank + 1)
+        seq_start = max(0, start - flank)
+        seq_end = end + flank
+
+        # pyfaidx使用1-based坐标
+        return record[seq_start:seq_end].seq
 
     def extract_sequences_batch(self, sites_df: pd.DataFrame,
                                flank: int = 10) -> List[str]:
         """
         批量提取序列
 
+        内部按(染色体, 起始位置)排序后顺序读取基因组，结果仍按sites_df的原始行顺序返回，
+        调用方无需预先排序。
+
         参数：
         - sites_df: 位点信息DataFrame，必须包含列: chrom, start, end, strand
         - flank: 侧翼区域长度
@@ -140,41 +207,98 @@ class SequenceExtractor:
         返回：
         - 序列列表
         """
-        sequences = []
+        n_sites = len(sites_df)
+        chroms = sites_df['chrom'].to_numpy()
+        starts = sites_df['start'].to_numpy(dtype=np.int64)
+        ends = sites_df['end'].to_numpy(dtype=np.int64)
+        if 'strand' in sites_df.columns:
+            strands = sites_df['strand'].to_numpy()
+        else:
+            strands = np.full(n_sites, '+')
+
+        if not self.has_genome:
+            return self._generate_random_sequences(n_sites, 2*flank + 1)
 
-        for idx, row in sites_df.iterrows():
-            seq = self.extract_sequence(
-                chrom=row['chrom'],
-                start=int(row['start']),
-                end=int(row['end']),
-                flank=flank,
-                strand=row.get('strand', '+')
-            )
-            sequences.append(seq)
+        # 按(染色体, 起始位置)排序后顺序读取，提高页缓存命中率
+        chrom_names, chrom_codes = np.unique(chroms.astype(str), return_inverse=True)
+        order = np.lexsort((starts, chrom_codes))
 
-            if (idx + 1) % 1000 == 0:
-                logger.info(f"已提取 {idx + 1}/{len(sites_df)} 条序列")
+        # 预先检查染色体名称，避免逐条try/except
+        for name in chrom_names:
+            if name not in self._chrom_cache:
+                logger.warning(f"基因组中不存在染色体 {name}，相应位点将使用模拟序列")
 
-        return sequences
+        sequences = [None] * n_sites
+        cur_code, cur_record = -1, None
+        log_progress = logger.isEnabledFor(logging.INFO)
+
+        for k, i in enumerate(order):
+            # 同一染色体的位点复用同一条记录
+            if chrom_codes[i] != cur_code:
+                cur_code = chrom_codes[i]
+                cur_record = self._chrom_cache.get(chrom_names[cur_code])
+
+            if cur_record is not None:
+                seq_start = max(0, int(starts[i]) - flank)
+                sequences[i] = cur_record[seq_start:int(ends[i]) + flank].seq
+
+            if log_progress and (k + 1) % 1000 == 0:
+                logger.info("已提取 %d/%d 条序列", k + 1, n_sites)
+
+        # 负链位点批量反向互补
+        minus_idx = [i for i in range(n_sites)
+                     if strands[i] == '-' and sequences[i] is not None]
+        rc_seqs = self._reverse_complement_batch([sequences[i] for i in minus_idx])
+        for i, seq in zip(minus_idx, rc_seqs):
+            sequences[i] = seq
+
+        return [seq[:2*flank + 1].upper() if seq is not None
+                else self._generate_random_sequence(2*flank + 1)
+                for seq in sequences]
 
     @staticmethod
     def _reverse_complement(sequence: str) -> str:
         """
         生成反向互补序列
         """
-        complement = {'A': 'T', 'T': 'A', 'C': 'G', 'G': 'C',
-                     'N': 'N', 'U': 'A', 'a': 't', 't': 'a',
-                     'c': 'g', 'g': 'c', 'n': 'n', 'u': 'a'}
-
-        return ''.join([complement.get(base, base) for base in reversed(sequence)])
+        return sequence.translate(_COMPLEMENT_TRANS)[::-1]
 
     @staticmethod
-    def _generate_random_sequence(length: int) -> str:
+    def _reverse_complement_batch(sequences: List[str]) -> List[str]:
+        """
+        批量生成反向互补序列（等长序列打包为uint8矩阵后一次处理）
+        """
+        result = [None] * len(sequences)
+
+        by_length = {}
+        for i, seq in enumerate(sequences):
+            by_length.setdefault(len(seq), []).append(i)
+
+        for length, indices in by_length.items():
+            raw = ''.join(sequences[i] for i in indices).encode('ascii')
+            seqs_u8 = np.frombuffer(raw, dtype=np.uint8).reshape(len(indices), length)
+            out = np.empty_like(seqs_u8)
+            _rc_batch_kernel(seqs_u8, out, _COMPLEMENT_TABLE)
+
+            flat = out.tobytes().decode('ascii')
+            for k, i in enumerate(indices):
+                result[i] = flat[k*length:(k + 1)*length]
+
+        return result
+
+    def _generate_random_sequence(self, length: int) -> str:
         """
         生成随机序列（模拟用）
         """
-        bases = ['A', 'U', 'C', 'G']
-        return ''.join(np.random.choice(bases, length))
+        return self._generate_random_sequences(1, length)[0]
+
+    def _generate_random_sequences(self, n: int, length: int) -> List[str]:
+        """
+        一次性生成n条等长随机序列（模拟用）
+        """
+        base_idx = self.rng.integers(0, 4, (n, length), dtype=np.uint8)
+        flat = _RANDOM_BASES[base_idx].tobytes().decode('ascii')
+        return [flat[i*length:(i + 1)*length] for i in range(n)]
 
 
 # ==============================================================================
@@ -197,6 +321,15 @@ class MotifAnalyzer:
         self.sequences = [seq.upper().replace('T', 'U') for seq in sequences]  # 统一为U
         self.motif_name = motif_name
         self.matrix = None
+        self._logo_matrix = None
+
+        # 所有序列以N分隔后一次性编码为uint8数组（A/U/C/G -> 0-3，其他 -> 255），
+        # PWM和k-mer统计共用，避免各自重复解析字符串
+        raw = 'N'.join(self.sequences).encode('ascii')
+        self._codes = _BASE_CODE_TABLE[np.frombuffer(raw, dtype=np.uint8)]
+        self._lengths = np.fromiter(map(len, self.sequences), dtype=np.int64,
+                                    count=len(self.sequences))
+        self._offsets = np.cumsum(self._lengths + 1) - (self._lengths + 1)
 
     def compute_pwm(self) -> pd.DataFrame:
         """
@@ -212,22 +345,21 @@ class MotifAnalyzer:
         seq_length = len(self.sequences[0])
         bases = ['A', 'U', 'C', 'G']
 
-        # 初始化计数矩阵
-        count_matrix = np.zeros((seq_length, len(bases)))
+        # 长度不一致的序列不参与统计
+        valid = self._lengths == seq_length
+        for length in self._lengths[~valid]:
+            logger.warning(f"序列长度不一致: {length} vs {seq_length}")
 
-        # 统计每个位置各碱基的出现次数
-        for seq in self.sequences:
-            if len(seq) != seq_length:
-                logger.warning(f"序列长度不一致: {len(seq)} vs {seq_length}")
-                continue
+        # 从共享编码数组中取出(N, L)的碱基编码矩阵，非标准碱基统一编码为4
+        codes = self._codes[self._offsets[valid, None] + np.arange(seq_length)]
+        codes = np.minimum(codes, 4)
 
-            for pos, base in enumerate(seq):
-                if base in bases:
-                    col_idx = bases.index(base)
-                    count_matrix[pos, col_idx] += 1
-                else:
-                    # 非标准碱基（如N），平均分配
-                    count_matrix[pos, :] += 0.25
+        # 一次bincount统计每个位置各碱基的出现次数
+        flat_idx = np.arange(seq_length) * 5 + codes
+        counts = np.bincount(flat_idx.ravel(), minlength=seq_length * 5).reshape(seq_length, 5)
+
+        # 非标准碱基（如N），平均分配
+        count_matrix = counts[:, :4] + 0.25 * counts[:, 4:5]
 
         # 添加伪计数（避免log(0)）
         count_matrix += 0.5
@@ -238,29 +370,55 @@ class MotifAnalyzer:
         # 转换为DataFrame
         self.matrix = pd.DataFrame(freq_matrix, columns=bases)
 
+        # logomaker绘图用的矩阵（行索引从1开始），只构建一次
+        self._logo_matrix = self.matrix.set_index(np.arange(1, seq_length + 1))
+
         return self.matrix
 
-    def find_enriched_kmers(self, k: int = 4, top_n: int = 10) -> List[Tuple[str, float]]:
+    def find_enriched_kmers(self, k: int = 4, top_n: int = 10,
+                            canonical: bool = False) -> List[Tuple[str, float]]:
         """
         寻找富集的k-mer
 
         参数：
         - k: k-mer长度
         - top_n: 返回前N个富集的k-mer
+        - canonical: 是否将k-mer与其反向互补合并计数（取编码较小者作为代表）
 
         返回：
         - [(kmer, frequency), ...]
         """
-        kmer_counts = Counter()
-
-        for seq in self.sequences:
-            for i in range(len(seq) - k + 1):
-                kmer = seq[i:i+k]
-                if 'N' not in kmer:
-                    kmer_counts[kmer] += 1
-
-        total = sum(kmer_counts.values())
-        kmer_freq = [(kmer, count/total) for kmer, count in kmer_counts.most_common(top_n)]
+        if not self.sequences:
+            return []
+
+        # 共享编码数组中序列以N分隔，跨越分隔符或含N的窗口会被过滤
+        codes = self._codes
+        if len(codes) < k:
+            return []
+
+        # 滑动窗口 + base-4加权得到每个k-mer的整数编码
+        windows = np.lib.stride_tricks.sliding_window_view(codes, k)
+        valid = (windows != 255).all(axis=1)
+        weights = 4 ** np.arange(k - 1, -1, -1, dtype=np.int64)
+        valid_windows = windows[valid].astype(np.int64)
+        kmer_codes = valid_windows @ weights
+
+        if canonical:
+            # A/U、C/G的编码只差最低位，互补即异或1；反转窗口后加权得到反向互补编码
+            rc_codes = (valid_windows[:, ::-1] ^ 1) @ weights
+            kmer_codes = np.minimum(kmer_codes, rc_codes)
+
+        kmer_counts = np.bincount(kmer_codes, minlength=4 ** k)
+        total = kmer_counts.sum()
+
+        # argpartition线性时间选出前top_n个，再只对这top_n个按计数降序排序
+        n_top = min(top_n, len(kmer_counts))
+        if n_top <= 0:
+            return []
+        top_idx = np.argpartition(kmer_counts, -n_top)[-n_top:]
+        top_idx = top_idx[np.lexsort((top_idx, -kmer_counts[top_idx]))]
+        kmer_freq = [(_decode_kmer(int(i), k), kmer_counts[i] / total)
+                     for i in top_idx if kmer_counts[i] > 0]
 
         return kmer_freq
 
@@ -277,15 +435,12 @@ class MotifAnalyzer:
 
         fig, ax = plt.subplots(figsize=figsize)
 
-        if HAS_LOGOMAKER:
+        use_logomaker = HAS_LOGOMAKER
+        if use_logomaker:
             # 使用logomaker绘制专业logo
             try:
-                # 确保行索引从1开始
-                matrix = self.matrix.copy()
-                matrix.index = np.arange(1, len(matrix) + 1)
-
                 # 创建logo
-                logo = logomaker.Logo(matrix, ax=ax)
+                logo = logomaker.Logo(self._logo_matrix, ax=ax)
 
                 # 样式设置
                 logo.style_spines(visible=False)
@@ -299,9 +454,9 @@ class MotifAnalyzer:
 
             except Exception as e:
                 logger.warning(f"logomaker绘图失败: {e}，使用matplotlib")
-                HAS_LOGOMAKER = False
+                use_logomaker = False
 
-        if not HAS_LOGOMAKER:
+        if not use_logomaker:
             # 使用matplotlib绘制简单版
             self._plot_logo_simple(ax)
 
@@ -329,28 +484,29 @@ class MotifAnalyzer:
         ax.set_title(f'{self.motif_name} Motif (n={len(self.sequences)})',
                     fontsize=14, fontweight='bold')
 
-        # 在每个位置绘制碱基
-        for pos in range(seq_length):
-            x = pos
-            y_bottom = 0
-
-            # 按频率从高到低排序
-            freqs = [(bases[i], matrix[pos, i]) for i in range(4)]
-            freqs.sort(key=lambda x: x[1], reverse=True)
-
-            for base, freq in freqs:
-                if freq > 0.01:  # 只显示频率>1%的碱基
-                    # 绘制矩形背景
-                    rect = plt.Rectangle((x - 0.4, y_bottom), 0.8, freq,
-                                        facecolor=colors[base], edgecolor='black', linewidth=0.5)
-                    ax.add_patch(rect)
-
-                    # 添加字母
-                    ax.text(x, y_bottom + freq/2, base,
-                           ha='center', va='center', fontsize=10,
-                           fontweight='bold', color='white')
-
-                    y_bottom += freq
+        # 每个位置按频率从高到低排序，累加得到各碱基矩形的底部高度
+        order = np.argsort(-matrix, axis=1, kind='stable')
+        sorted_freqs = np.take_along_axis(matrix, order, axis=1)
+        y_bottoms = np.cumsum(sorted_freqs, axis=1) - sorted_freqs
+
+        # 只显示频率>1%的碱基
+        pos_idx, rank_idx = np.nonzero(sorted_freqs > 0.01)
+        base_idx = order[pos_idx, rank_idx]
+        freqs = sorted_freqs[pos_idx, rank_idx]
+        bottoms = y_bottoms[pos_idx, rank_idx]
+
+        # 所有矩形背景合并为一个PatchCollection一次添加
+        rects = [Rectangle((x - 0.4, y), 0.8, h)
+                 for x, y, h in zip(pos_idx, bottoms, freqs)]
+        ax.add_collection(PatchCollection(rects,
+                                          facecolors=[colors[bases[b]] for b in base_idx],
+                                          edgecolors='black', linewidths=0.5))
+
+        # 添加字母
+        for x, y, h, b in zip(pos_idx, bottoms, freqs, base_idx):
+            ax.text(x, y + h/2, bases[b],
+                   ha='center', va='center', fontsize=10,
+                   fontweight='bold', color='white')
 
         # 添加中心线（修饰位点）
         center_pos = seq_length // 2
@@ -358,20 +514,56 @@ class MotifAnalyzer:
         ax.text(center_pos + 0.5, 1.02, 'Modified site', ha='center', fontsize=9)
 
 
+def count_motif_presence(sequences: List[str], motifs: List[str]) -> dict:
+    """
+    统计包含各motif的序列条数（每条序列每个motif最多计一次）
+
+    安装pyahocorasick时用Aho-Corasick自动机一次扫描所有motif，否则逐个motif用str.contains
+
+    参数：
+    - sequences: 序列列表
+    - motifs: motif列表
+
+    返回：
+    - {motif: 含该motif的序列数}
+    """
+    counts = dict.fromkeys(motifs, 0)
+
+    if HAS_AHOCORASICK:
+        automaton = ahocorasick.Automaton()
+        for motif in motifs:
+            automaton.add_word(motif, motif)
+        automaton.make_automaton()
+
+        for seq in sequences:
+            for motif in {m for _, m in automaton.iter(seq)}:
+                counts[motif] += 1
+    else:
+        seq_series = pd.Series(sequences, dtype=object)
+        for motif in motifs:
+            counts[motif] = int(seq_series.str.contains(motif, regex=False).sum())
+
+    return counts
+
+
 # ==============================================================================
 # 主函数
 # ==============================================================================
 
-def analyze_psi_motif(psi_df, fasta_path, flank=10):
+def analyze_psi_motif(psi_df, extractor, flank=10):
     """
     分析Ψ位点的motif
+
+    参数：
+    - psi_df: 位点DataFrame
+    - extractor: 共享的SequenceExtractor（避免重复加载基因组索引）
+    - flank: 侧翼区域长度
     """
     logger.info("\n" + "=" * 80)
     logger.info("分析Pseudouridine (Ψ) Motif")
     logger.info("=" * 80 + "\n")
 
     # 提取序列
-    extractor = SequenceExtractor(fasta_path)
     sequences = extractor.extract_sequences_batch(psi_df, flank=flank)
 
     logger.info(f"成功提取 {len(sequences)} 条序列（侧翼±{flank}bp）")
@@ -392,8 +584,9 @@ def analyze_psi_motif(psi_df, fasta_path, flank=10):
     # 验证已知motif
     logger.info("\n验证已知Ψ motifs:")
     known_motifs = ['GUUC', 'UGU', 'UUCG', 'GUC']
+    motif_counts = count_motif_presence(sequences, known_motifs)
     for motif in known_motifs:
-        count = sum(1 for seq in sequences if motif in seq)
+        count = motif_counts[motif]
         logger.info(f"  {motif}: {count}/{len(sequences)} ({count/len(sequences)*100:.2f}%)")
 
     # 绘制logo
@@ -408,16 +601,20 @@ def analyze_psi_motif(psi_df, fasta_path, flank=10):
     return analyzer
 
 
-def analyze_m6a_motif(m6a_df, fasta_path, flank=10):
+def analyze_m6a_motif(m6a_df, extractor, flank=10):
     """
     分析m6A位点的motif
+
+    参数：
+    - m6a_df: 位点DataFrame
+    - extractor: 共享的SequenceExtractor（避免重复加载基因组索引）
+    - flank: 侧翼区域长度
     """
     logger.info("\n" + "=" * 80)
     logger.info("分析m6A Motif")
     logger.info("=" * 80 + "\n")
 
     # 提取序列
-    extractor = SequenceExtractor(fasta_path)
     sequences = extractor.extract_sequences_batch(m6a_df, flank=flank)
 
     logger.info(f"成功提取 {len(sequences)} 条序列（侧翼±{flank}bp）")
@@ -438,8 +635,9 @@ def analyze_m6a_motif(m6a_df, fasta_path, flank=10):
     # 验证已知motif（DRACH motif）
     logger.info("\n验证已知m6A motifs (DRACH):")
     known_motifs = ['GGACU', 'GGACA', 'GGACT', 'AGACU', 'GAACU']
+    motif_counts = count_motif_presence(sequences, known_motifs)
     for motif in known_motifs:
-        count = sum(1 for seq in sequences if motif in seq)
+        count = motif_counts[motif]
         logger.info(f"  {motif}: {count}/{len(sequences)} ({count/len(sequences)*100:.2f}%)")
 
     # 绘制logo
@@ -454,6 +652,22 @@ def analyze_m6a_motif(m6a_df, fasta_path, flank=10):
     return analyzer
 
 
+def _run_motif_analysis(analyze_func, sites_df, fasta_path, flank=10):
+    """
+    子进程入口：在子进程内加载基因组并运行一组motif分析
+
+    参数：
+    - analyze_func: analyze_psi_motif 或 analyze_m6a_motif
+    - sites_df: 位点DataFrame
+    - fasta_path: 基因组FASTA文件路径
+    - flank: 侧翼区域长度
+    """
+    # 子进程中不弹出交互窗口，图片仍通过savefig保存
+    plt.switch_backend('Agg')
+    extractor = SequenceExtractor(fasta_path)
+    analyze_func(sites_df, extractor, flank=flank)
+
+
 def main():
     """
     主执行函数
@@ -495,11 +709,14 @@ def main():
         # 创建一个虚拟的FASTA路径
         fasta_path = DATA_DIR / "mock_hg38.fa"
 
-    # 分析Ψ motif
-    analyze_psi_motif(psi_subset, fasta_path, flank=10)
-
-    # 分析m6A motif
-    analyze_m6a_motif(m6a_subset, fasta_path, flank=10)
+    # Ψ和m6A两组分析相互独立，各用一个进程并行（每个进程加载一次基因组）
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        futures = [
+            executor.submit(_run_motif_analysis, analyze_psi_motif, psi_subset, fasta_path, 10),
+            executor.submit(_run_motif_analysis, analyze_m6a_motif, m6a_subset, fasta_path, 10),
+        ]
+        for future in futures:
+            future.result()
 
     logger.info("\n" + "=" * 80)
     logger.info("Motif分析完成！")
@@ -16,10 +16,13 @@ Metagene Profile分析模块 - RNA修饰比较分析
 
 import pandas as pd
 import numpy as np
+import matplotlib
+matplotlib.use('Agg')  # 批处理脚本，无需GUI后端
 import matplotlib.pyplot as plt
 import seaborn as sns
 from pathlib import Path
 import logging
+from functools import lru_cache
 from scipy import stats
 from scipy.signal import savgol_filter
 import warnings
@@ -42,6 +45,44 @@ RESULTS_DIR = PROJECT_DIR / "results"
 FIGURES_DIR = PROJECT_DIR / "figures"
 
 
+@lru_cache(maxsize=None)
+def _bin_layout(n_bins: int):
+    """
+    计算并缓存bin边界和中心（只读数组，按n_bins复用）
+    """
+    bins = np.linspace(0, 1, n_bins + 1)
+    bin_centers = (bins[:-1] + bins[1:]) / 2
+    bins.setflags(write=False)
+    bin_centers.setflags(write=False)
+    return bins, bin_centers
+
+
+@lru_cache(maxsize=None)
+def _savgol_operator(n_bins: int, window: int, polyorder: int = 2) -> np.ndarray:
+    """
+    缓存Savitzky-Golay平滑的线性算子矩阵M（n_bins x n_bins），使 savgol_filter(x) == M @ x
+
+    对单位矩阵逐列滤波得到，边界处理与savgol_filter默认的interp模式完全一致
+    """
+    operator = savgol_filter(np.eye(n_bins), window, polyorder=polyorder, axis=0)
+    operator.setflags(write=False)
+    return operator
+
+
+def _bin_indices(positions: np.ndarray, n_bins: int) -> np.ndarray:
+    """
+    将[0, 1]内的相对位置映射为bin编号（与np.histogram的分箱结果一致，区间外的值被丢弃）
+    """
+    bins, _ = _bin_layout(n_bins)
+    positions = positions[(positions >= 0) & (positions <= 1)]
+
+    idx = np.minimum((positions * n_bins).astype(np.int64), n_bins - 1)
+    # 按bin边界修正浮点舍入造成的偏移
+    idx -= positions < bins[idx]
+    idx += (positions >= bins[idx + 1]) & (idx != n_bins - 1)
+    return idx
+
+
 # ==============================================================================
 # Metagene Profile分析
 # ==============================================================================
@@ -78,37 +119,8 @@ class MetageneProfiler:
         返回：
         - DataFrame包含bin位置和对应的修饰密度
         """
-        # 将基因分成100个bin (0% -> 100%)
-        bins = np.linspace(0, 1, n_bins + 1)
-        bin_centers = (bins[:-1] + bins[1:]) / 2
-
-        # 统计每个bin中的位点数
-        hist, _ = np.histogram(self.sites_df['relative_pos'], bins=bins)
-
-        # 归一化（总位点数=1）
-        density = hist / hist.sum()
-
-        # 应用平滑（Savitzky-Golay滤波器）
-        if smooth and len(density) > window:
-            try:
-                density_smooth = savgol_filter(density, window, polyorder=2)
-                # 确保平滑后非负
-                density_smooth = np.maximum(density_smooth, 0)
-                # 重新归一化
-                density_smooth = density_smooth / density_smooth.sum()
-            except:
-                density_smooth = density
-        else:
-            density_smooth = density
-
-        # 保存结果
-        self.bin_counts = density_smooth
-        self.bins = bin_centers
-
-        return pd.DataFrame({
-            'bin_center': bin_centers,
-            'density': density_smooth
-        })
+        return compute_metagene_profiles([self], n_bins=n_bins,
+                                         smooth=smooth, window=window)[0]
 
     def get_feature_distribution(self) -> pd.Series:
         """
@@ -125,6 +137,76 @@ class MetageneProfiler:
         return feature_counts
 
 
+def compute_metagene_profiles(profilers, n_bins: int = 100,
+                              smooth: bool = True,
+                              window: int = 9):
+    """
+    一次性计算多个修饰的metagene profile（合并分箱、平滑和归一化）
+
+    参数：
+    - profilers: MetageneProfiler列表
+    - n_bins: bin数量（通常100）
+    - smooth: 是否平滑曲线
+    - window: 平滑窗口大小（必须为奇数）
+
+    返回：
+    - 与profilers顺序对应的profile DataFrame列表
+    """
+    # 将基因分成100个bin (0% -> 100%)
+    _, bin_centers = _bin_layout(n_bins)
+
+    # 所有修饰的位点按(修饰编号, bin)一次bincount
+    flat_idx = []
+    for label, profiler in enumerate(profilers):
+        positions = profiler.sites_df['relative_pos'].to_numpy(dtype=np.float64)
+        flat_idx.append(label * n_bins + _bin_indices(positions, n_bins))
+
+    hist = np.bincount(np.concatenate(flat_idx),
+                       minlength=len(profilers) * n_bins).reshape(len(profilers), n_bins)
+
+    # 归一化（每种修饰总位点数=1）
+    density = hist / hist.sum(axis=1, keepdims=True)
+
+    # 应用平滑（Savitzky-Golay滤波器，逐行）
+    if smooth and n_bins > window:
+        try:
+            density_smooth = density @ _savgol_operator(n_bins, window, 2).T
+            # 确保平滑后非负
+            density_smooth = np.maximum(density_smooth, 0)
+            # 重新归一化
+            density_smooth = density_smooth / density_smooth.sum(axis=1, keepdims=True)
+        except:
+            density_smooth = density
+    else:
+        density_smooth = density
+
+    profiles = []
+    for profiler, row in zip(profilers, density_smooth):
+        # 保存结果
+        profiler.bin_counts = row
+        profiler.bins = bin_centers
+        profiles.append(pd.DataFrame({
+            'bin_center': bin_centers,
+            'density': row
+        }))
+
+    return profiles
+
+
+# 基因组特征的固定顺序
+FEATURE_ORDER = ('5UTR', 'CDS', '3UTR')
+
+
+def _feature_matrix(psi_features: pd.Series, m6a_features: pd.Series,
+                    order=FEATURE_ORDER) -> np.ndarray:
+    """
+    将两种修饰的特征计数整理为(特征数, 2)的int64矩阵，列依次为Ψ、m6A，缺失特征计为0
+    """
+    return np.stack([psi_features.reindex(order, fill_value=0).to_numpy(dtype=np.int64),
+                     m6a_features.reindex(order, fill_value=0).to_numpy(dtype=np.int64)],
+                    axis=1)
+
+
 # ==============================================================================
 # 可视化函数
 # ==============================================================================
@@ -173,13 +255,15 @@ def plot_metagene_profile_comparison(psi_profile: pd.DataFrame,
     ax.set_xlim(0, 1)
     ax.grid(True, alpha=0.3)
 
-    plt.tight_layout()
+    fig.tight_layout()
 
     if output_file:
-        plt.savefig(output_file, dpi=300, bbox_inches='tight')
+        fig.savefig(output_file, dpi=300, bbox_inches='tight')
         logger.info(f"保存Metagene Profile图: {output_file}")
+    else:
+        plt.show()
 
-    plt.show()
+    plt.close(fig)
 
 
 def plot_feature_distribution_comparison(psi_features: pd.Series,
@@ -194,14 +278,15 @@ def plot_feature_distribution_comparison(psi_features: pd.Series,
     - output_file: 输出文件路径
     """
     # 确保两者包含相同的特征
-    all_features = ['5UTR', 'CDS', '3UTR']
+    all_features = FEATURE_ORDER
 
-    psi_counts = [psi_features.get(f, 0) for f in all_features]
-    m6a_counts = [m6a_features.get(f, 0) for f in all_features]
+    counts = _feature_matrix(psi_features, m6a_features, all_features)
+    psi_counts = counts[:, 0]
+    m6a_counts = counts[:, 1]
 
     # 转换为百分比
-    psi_percent = np.array(psi_counts) / sum(psi_counts) * 100
-    m6a_percent = np.array(m6a_counts) / sum(m6a_counts) * 100
+    psi_percent = psi_counts / psi_counts.sum() * 100
+    m6a_percent = m6a_counts / m6a_counts.sum() * 100
 
     # 绘图
     fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 5))
@@ -254,13 +339,15 @@ def plot_feature_distribution_comparison(psi_features: pd.Series,
                  fontsize=13, fontweight='bold')
     ax2.legend()
 
-    plt.tight_layout()
+    fig.tight_layout()
 
     if output_file:
-        plt.savefig(output_file, dpi=300, bbox_inches='tight')
+        fig.savefig(output_file, dpi=300, bbox_inches='tight')
         logger.info(f"保存特征分布对比图: {output_file}")
+    else:
+        plt.show()
 
-    plt.show()
+    plt.close(fig)
 
 
 def plot_pie_charts(psi_features: pd.Series,
@@ -277,16 +364,12 @@ def plot_pie_charts(psi_features: pd.Series,
     fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(12, 5))
 
     # 准备数据
-    def prepare_data(features):
-        data = [features.get('5UTR', 0),
-                features.get('CDS', 0),
-                features.get('3UTR', 0)]
-        labels = ["5'UTR", 'CDS', "3'UTR"]
-        colors = ['#95a5a6', '#2ecc71', '#f39c12']
-        return data, labels, colors
+    counts = _feature_matrix(psi_features, m6a_features)
+    labels = ["5'UTR", 'CDS', "3'UTR"]
+    colors = ['#95a5a6', '#2ecc71', '#f39c12']
 
-    psi_data, psi_labels, psi_colors = prepare_data(psi_features)
-    m6a_data, m6a_labels, m6a_colors = prepare_data(m6a_features)
+    psi_data, psi_labels, psi_colors = counts[:, 0], labels, colors
+    m6a_data, m6a_labels, m6a_colors = counts[:, 1], labels, colors
 
     # 绘制饼图
     wedges1, texts1, autotexts1 = ax1.pie(psi_data, labels=psi_labels, colors=psi_colors,
@@ -306,13 +389,15 @@ def plot_pie_charts(psi_features: pd.Series,
         autotext.set_color('white')
         autotext.set_fontsize(12)
 
-    plt.tight_layout()
+    fig.tight_layout()
 
     if output_file:
-        plt.savefig(output_file, dpi=300, bbox_inches='tight')
+        fig.savefig(output_file, dpi=300, bbox_inches='tight')
         logger.info(f"保存饼图: {output_file}")
+    else:
+        plt.show()
 
-    plt.show()
+    plt.close(fig)
 
 
 # ==============================================================================
@@ -338,16 +423,14 @@ def compare_distributions(psi_df: pd.DataFrame, m6a_df: pd.DataFrame):
     m6a_features = m6a_df['feature'].value_counts()
 
     # 构建列联表
-    contingency_table = pd.DataFrame({
-        'Ψ': [psi_features.get('5UTR', 0), psi_features.get('CDS', 0), psi_features.get('3UTR', 0)],
-        'm6A': [m6a_features.get('5UTR', 0), m6a_features.get('CDS', 0), m6a_features.get('3UTR', 0)]
-    }, index=['5UTR', 'CDS', '3UTR'])
+    counts = _feature_matrix(psi_features, m6a_features)
+    contingency_table = pd.DataFrame(counts, columns=['Ψ', 'm6A'], index=list(FEATURE_ORDER))
 
     logger.info("\n列联表:")
     logger.info(contingency_table)
 
     # 卡方检验
-    chi2, p_value, dof, expected = stats.chi2_contingency(contingency_table)
+    chi2, p_value, dof, expected = stats.chi2_contingency(counts)
     logger.info(f"\n卡方检验结果:")
     logger.info(f"  Chi2 = {chi2:.2f}")
     logger.info(f"  P-value = {p_value:.2e}")
@@ -363,8 +446,8 @@ def compare_distributions(psi_df: pd.DataFrame, m6a_df: pd.DataFrame):
     # 2. 比较在基因上的相对位置分布（Kolmogorov-Smirnov检验）
     logger.info("\n[2] 相对位置分布差异分析（KS检验）")
 
-    psi_positions = psi_df['relative_pos'].values
-    m6a_positions = m6a_df['relative_pos'].values
+    psi_positions = psi_df['relative_pos'].to_numpy(dtype=np.float64, copy=False)
+    m6a_positions = m6a_df['relative_pos'].to_numpy(dtype=np.float64, copy=False)
 
     ks_stat, ks_p = stats.ks_2samp(psi_positions, m6a_positions)
     logger.info(f"\nKS检验结果:")
@@ -425,8 +508,9 @@ def main():
     psi_profiler = MetageneProfiler(psi_df, 'Pseudouridine (Ψ)')
     m6a_profiler = MetageneProfiler(m6a_df, 'm6A')
 
-    psi_profile = psi_profiler.compute_metagene_profile(n_bins=100, smooth=True, window=9)
-    m6a_profile = m6a_profiler.compute_metagene_profile(n_bins=100, smooth=True, window=9)
+    psi_profile, m6a_profile = compute_metagene_profiles(
+        [psi_profiler, m6a_profiler], n_bins=100, smooth=True, window=9
+    )
 
     # 保存profile数据
     psi_profile.to_csv(RESULTS_DIR / "psi_metagene_profile.csv", index=False)
@@ -16,10 +16,13 @@
 
 import pandas as pd
 import numpy as np
+import matplotlib
+matplotlib.use('Agg')  # 批处理脚本，无需GUI后端
 import matplotlib.pyplot as plt
 from pathlib import Path
 import logging
-from matplotlib_venn import venn2, venn2_circles
+from site_io import CHROM_ORDER, load_cached
+from viz import plot_venn_diagram
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -33,6 +36,35 @@ RESULTS_DIR = PROJECT_DIR / "results"
 FIGURES_DIR = PROJECT_DIR / "figures"
 
 
+# 共定位分析报告模板（main中用format_map一次填充）
+REPORT_HEADER = """
+{rule}
+共定位分析报告
+{rule}
+
+位点统计:
+  Ψ位点总数: {n_psi:,}
+  m6A位点总数: {n_m6a:,}
+  仅Ψ: {psi_only:,} ({psi_only_pct:.1f}%)
+  仅m6A: {m6a_only:,} ({m6a_only_pct:.1f}%)
+  共定位: {overlap:,} ({overlap_psi_pct:.1f}% of Ψ, {overlap_m6a_pct:.1f}% of m6A)
+
+共定位位点特征:
+"""
+
+REPORT_FEATURES = """
+  - 平均距离: {mean:.1f} ± {std:.1f} bp
+  - 中位数距离: {median:.0f} bp
+  - 最大距离: {max:.0f} bp
+  - 最小距离: {min:.0f} bp
+  - 链方向一致: {n_same}/{n_pairs} ({same_pct:.1f}%)
+"""
+
+REPORT_NO_COLOCALIZATION = "\n  未检测到共定位位点\n"
+
+REPORT_FOOTER = "\n{rule}\n"
+
+
 # ==============================================================================
 # 共定位分析
 # ==============================================================================
@@ -53,13 +85,21 @@ class ColocalizationAnalyzer:
         - window: 共定位窗口大小（bp）
                   如果Ψ和m6A位点距离小于window，认为它们共定位
         """
-        self.psi_df = psi_df
-        self.m6a_df = m6a_df
         self.window = window
 
-        # 创建位点ID（用于韦恩图）
-        self.psi_df['site_id'] = ['PSI_' + str(i) for i in range(len(psi_df))]
-        self.m6a_df['site_id'] = ['M6A_' + str(i) for i in range(len(m6a_df))]
+        # 创建位点ID（用于韦恩图）：即行号，用int64存储，不修改传入的DataFrame
+        self.psi_df = psi_df.assign(site_id=np.arange(len(psi_df), dtype=np.int64))
+        self.m6a_df = m6a_df.assign(site_id=np.arange(len(m6a_df), dtype=np.int64))
+
+        # 预先计算中心坐标：存储start+end（即两倍中心），避免浮点除法且与原距离阈值等价
+        self._psi_center2 = self._center2(self.psi_df)
+        self._m6a_center2 = self._center2(self.m6a_df)
+
+        # 每条染色体上的m6A位点按中心坐标排序一次，供二分查找复用
+        self._m6a_sorted = {}
+        for chrom, idx in self.m6a_df.groupby('chrom', sort=False).indices.items():
+            idx = idx[np.argsort(self._m6a_center2[idx], kind='stable')]
+            self._m6a_sorted[chrom] = (idx, self._m6a_center2[idx])
 
         # 结果存储
         self.colocalized_sites = None
@@ -75,39 +115,56 @@ class ColocalizationAnalyzer:
         """
         logger.info(f"正在寻找共定位位点（窗口±{self.window}bp）...")
 
-        colocalized_pairs = []
-
-        # 遍历每个Ψ位点
-        for psi_idx, psi_row in self.psi_df.iterrows():
-            psi_chrom = psi_row['chrom']
-            psi_center = (psi_row['start'] + psi_row['end']) / 2
-
-            # 在m6A位点中寻找同一染色体上附近的位点
-            nearby_m6a = self.m6a_df[
-                (self.m6a_df['chrom'] == psi_chrom) &
-                (abs((self.m6a_df['start'] + self.m6a_df['end'])/2 - psi_center) <= self.window)
-            ]
-
-            for m6a_idx, m6a_row in nearby_m6a.iterrows():
-                distance = abs((psi_row['start'] + psi_row['end'])/2 -
-                             (m6a_row['start'] + m6a_row['end'])/2)
-
-                pair_info = {
-                    'psi_id': psi_row['site_id'],
-                    'm6a_id': m6a_row['site_id'],
-                    'chrom': psi_chrom,
-                    'psi_pos': int(psi_center),
-                    'm6a_pos': int((m6a_row['start'] + m6a_row['end'])/2),
-                    'distance': int(distance),
-                    'psi_feature': psi_row.get('feature', 'Unknown'),
-                    'm6a_feature': m6a_row.get('feature', 'Unknown'),
-                    'psi_strand': psi_row.get('strand', '+'),
-                    'm6a_strand': m6a_row.get('strand', '+')
-                }
-                colocalized_pairs.append(pair_info)
-
-        if colocalized_pairs:
-            self.colocalized_sites = pd.DataFrame(colocalized_pairs)
+        psi_sum = self._psi_center2
+        m6a_sum = self._m6a_center2
+        max_diff = 2 * self.window
+
+        # 一次性取出输出所需的列数组，后续只做整数索引
+        psi_ids = self.psi_df['site_id'].to_numpy()
+        m6a_ids = self.m6a_df['site_id'].to_numpy()
+        psi_chrom = self.psi_df['chrom'].to_numpy()
+        psi_feature = self._column_array(self.psi_df, 'feature', 'Unknown')
+        m6a_feature = self._column_array(self.m6a_df, 'feature', 'Unknown')
+        psi_strand = self._column_array(self.psi_df, 'strand', '+')
+        m6a_strand = self._column_array(self.m6a_df, 'strand', '+')
+
+        # 按染色体分组，在预排序的m6A中心上二分查找窗口区间
+        psi_parts, m6a_parts = [], []
+
+        for chrom, psi_idx in self.psi_df.groupby('chrom', sort=False).indices.items():
+            if chrom not in self._m6a_sorted:
+                continue
+            m6a_sorted, sorted_sum = self._m6a_sorted[chrom]
+
+            lo = np.searchsorted(sorted_sum, psi_sum[psi_idx] - max_diff, side='left')
+            hi = np.searchsorted(sorted_sum, psi_sum[psi_idx] + max_diff, side='right')
+            n_hits = hi - lo
+
+            # 展开每个Ψ位点对应的连续区间[lo, hi)
+            offsets = np.repeat(lo - (np.cumsum(n_hits) - n_hits), n_hits)
+            psi_parts.append(np.repeat(psi_idx, n_hits))
+            m6a_parts.append(m6a_sorted[offsets + np.arange(n_hits.sum())])
+
+        psi_sel = np.concatenate(psi_parts) if psi_parts else np.empty(0, dtype=np.int64)
+        m6a_sel = np.concatenate(m6a_parts) if m6a_parts else np.empty(0, dtype=np.int64)
+
+        # 恢复为按Ψ位点、m6A位点原始顺序排列
+        order = np.lexsort((m6a_sel, psi_sel))
+        psi_sel, m6a_sel = psi_sel[order], m6a_sel[order]
+
+        if len(psi_sel) > 0:
+            self.colocalized_sites = pd.DataFrame({
+                'psi_id': psi_ids[psi_sel],
+                'm6a_id': m6a_ids[m6a_sel],
+                'chrom': psi_chrom[psi_sel],
+                'psi_pos': psi_sum[psi_sel] // 2,
+                'm6a_pos': m6a_sum[m6a_sel] // 2,
+                'distance': np.abs(psi_sum[psi_sel] - m6a_sum[m6a_sel]) // 2,
+                'psi_feature': psi_feature[psi_sel],
+                'm6a_feature': m6a_feature[m6a_sel],
+                'psi_strand': psi_strand[psi_sel],
+                'm6a_strand': m6a_strand[m6a_sel]
+            })
             logger.info(f"  找到 {len(self.colocalized_sites)} 对共定位位点")
         else:
             self.colocalized_sites = pd.DataFrame()
@@ -115,6 +172,22 @@ class ColocalizationAnalyzer:
 
         return self.colocalized_sites
 
+    @staticmethod
+    def _center2(df: pd.DataFrame) -> np.ndarray:
+        """
+        计算位点中心坐标的两倍（start + end），int64
+        """
+        return df['start'].to_numpy(dtype=np.int64) + df['end'].to_numpy(dtype=np.int64)
+
+    @staticmethod
+    def _column_array(df: pd.DataFrame, column: str, default) -> np.ndarray:
+        """
+        取出列的NumPy数组，列不存在时返回填充默认值的数组
+        """
+        if column in df.columns:
+            return df[column].to_numpy()
+        return np.full(len(df), default, dtype=object)
+
     def categorize_sites(self):
         """
         将位点分类为：仅Ψ、仅m6A、共定位
@@ -122,20 +195,23 @@ class ColocalizationAnalyzer:
         if self.colocalized_sites is None:
             self.find_colocalized_sites()
 
-        # 共定位的位点ID
-        colocalized_psi_ids = set(self.colocalized_sites['psi_id']) if len(self.colocalized_sites) > 0 else set()
-        colocalized_m6a_ids = set(self.colocalized_sites['m6a_id']) if len(self.colocalized_sites) > 0 else set()
+        # 共定位位点标记：site_id即行号，直接按ID写入布尔掩码
+        psi_mask = np.zeros(len(self.psi_df), dtype=bool)
+        m6a_mask = np.zeros(len(self.m6a_df), dtype=bool)
+        if len(self.colocalized_sites) > 0:
+            psi_mask[self.colocalized_sites['psi_id'].to_numpy()] = True
+            m6a_mask[self.colocalized_sites['m6a_id'].to_numpy()] = True
 
         # 仅Ψ
-        self.psi_only = self.psi_df[~self.psi_df['site_id'].isin(colocalized_psi_ids)]
+        self.psi_only = self.psi_df[~psi_mask]
 
         # 仅m6A
-        self.m6a_only = self.m6a_df[~self.m6a_df['site_id'].isin(colocalized_m6a_ids)]
+        self.m6a_only = self.m6a_df[~m6a_mask]
 
         logger.info("\n位点分类结果:")
         logger.info(f"  仅Ψ: {len(self.psi_only)} 个位点")
         logger.info(f"  仅m6A: {len(self.m6a_only)} 个位点")
-        logger.info(f"  共定位: {len(colocalized_psi_ids)} 个Ψ位点 + {len(colocalized_m6a_ids)} 个m6A位点")
+        logger.info(f"  共定位: {psi_mask.sum()} 个Ψ位点 + {m6a_mask.sum()} 个m6A位点")
 
     def get_venn_counts(self):
         """
@@ -147,7 +223,7 @@ class ColocalizationAnalyzer:
         if self.colocalized_sites is None:
             self.find_colocalized_sites()
 
-        overlap_count = len(set(self.colocalized_sites['psi_id'])) if len(self.colocalized_sites) > 0 else 0
+        overlap_count = len(np.unique(self.colocalized_sites['psi_id'].to_numpy())) if len(self.colocalized_sites) > 0 else 0
 
         return (len(self.psi_only), len(self.m6a_only), overlap_count)
 
@@ -156,132 +232,112 @@ class ColocalizationAnalyzer:
 # 可视化函数
 # ==============================================================================
 
-def plot_venn_diagram(psi_only: int, m6a_only: int, overlap: int,
-                     output_file: str = None):
+def summarize_colocalization(colocalized_df: pd.DataFrame):
     """
-    绘制韦恩图
+    汇总共定位位点的距离统计和链方向一致性（每列只遍历一次，绘图和报告共用）
 
     参数：
-    - psi_only: 仅Ψ的位点数
-    - m6a_only: 仅m6A的位点数
-    - overlap: 共定位位点数
-    - output_file: 输出文件路径
-    """
-    plt.figure(figsize=(10, 8))
-
-    # 创建子图
-    subset = (psi_only, m6a_only, overlap)
-
-    # 绘制韦恩图
-    v = venn2(subsets=subset, set_labels=('Pseudouridine (Ψ)', 'm6A'),
-             set_colors=('#3498db', '#e74c3c'), alpha=0.6)
-
-    # 自定义样式
-    if v:
-        # 设置标签字体
-        for text in v.set_labels:
-            text.set_fontsize(14)
-            text.set_fontweight('bold')
-
-        # 设置区域数字
-        for text in v.subset_labels:
-            if text:
-                text.set_fontsize(16)
-                text.set_fontweight('bold')
-
-    # 添加圆圈边框
-    venn2_circles(subsets=subset, linestyle='dashed', linewidth=2)
-
-    # 添加标题和统计信息
-    total_psi = psi_only + overlap
-    total_m6a = m6a_only + overlap
-
-    plt.title(f'Colocalization Analysis: Ψ vs m6A\n'
-             f'Total Ψ: {total_psi:,} | Total m6A: {total_m6a:,} | Overlap: {overlap:,} '
-             f'({overlap/max(total_psi, total_m6a)*100:.1f}% of Ψ sites)',
-             fontsize=14, fontweight='bold', pad=20)
-
-    plt.tight_layout()
-
-    if output_file:
-        plt.savefig(output_file, dpi=300, bbox_inches='tight')
-        logger.info(f"保存韦恩图: {output_file}")
+    - colocalized_df: 共定位位点DataFrame
 
-    plt.show()
+    返回：
+    - (距离统计Series[median/mean/std/min/max], 链方向一致的布尔数组)
+    """
+    distance_stats = colocalized_df['distance'].agg(['median', 'mean', 'std', 'min', 'max'])
+    same_strand = colocalized_df['psi_strand'].to_numpy() == colocalized_df['m6a_strand'].to_numpy()
+    return distance_stats, same_strand
 
 
 def plot_colocalization_features(colocalized_df: pd.DataFrame,
-                                 output_file: str = None):
+                                 output_file: str = None,
+                                 summary=None):
     """
     分析共定位位点的特征分布
 
     参数：
     - colocalized_df: 共定位位点DataFrame
     - output_file: 输出文件路径
+    - summary: summarize_colocalization()的结果，缺省时现场计算
     """
     if len(colocalized_df) == 0:
         logger.warning("没有共定位位点，跳过特征分析")
         return
 
-    fig, axes = plt.subplots(2, 2, figsize=(14, 10))
-
-    # 1. 距离分布
-    ax1 = axes[0, 0]
-    ax1.hist(colocalized_df['distance'], bins=30, color='#9b59b6',
-            edgecolor='black', alpha=0.7)
-    ax1.set_xlabel('Distance between sites (bp)', fontsize=11, fontweight='bold')
-    ax1.set_ylabel('Count', fontsize=11, fontweight='bold')
-    ax1.set_title('Distribution of Distances\nbetween Colocalized Sites',
-                 fontsize=12, fontweight='bold')
-    ax1.axvline(colocalized_df['distance'].median(), color='red',
-               linestyle='--', linewidth=2, label=f"Median: {colocalized_df['distance'].median():.0f}bp")
-    ax1.legend()
-    ax1.grid(axis='y', alpha=0.3)
-
-    # 2. 特征组合分布
-    ax2 = axes[0, 1]
-    feature_combinations = colocalized_df['psi_feature'] + ' (Ψ) + ' + colocalized_df['m6a_feature'] + ' (m6A)'
-    feature_counts = feature_combinations.value_counts()
-
-    colors = plt.cm.Set3(np.linspace(0, 1, len(feature_counts)))
-    feature_counts.plot(kind='barh', ax=ax2, color=colors, edgecolor='black')
-    ax2.set_xlabel('Count', fontsize=11, fontweight='bold')
-    ax2.set_title('Feature Combinations at Colocalized Sites',
-                 fontsize=12, fontweight='bold')
-    ax2.grid(axis='x', alpha=0.3)
-
-    # 3. 链方向一致性
-    ax3 = axes[1, 0]
-    strand_consistency = (colocalized_df['psi_strand'] == colocalized_df['m6a_strand']).value_counts()
-    strand_labels = ['Same strand', 'Different strands']
-    strand_colors = ['#2ecc71', '#e74c3c']
-
-    ax3.pie(strand_consistency, labels=strand_labels, colors=strand_colors,
-           autopct='%1.1f%%', startangle=90, explode=(0.05, 0.05),
-           shadow=True, textprops={'fontsize': 11, 'fontweight': 'bold'})
-    ax3.set_title('Strand Consistency', fontsize=12, fontweight='bold', pad=15)
-
-    # 4. 染色体分布
-    ax4 = axes[1, 1]
-    chrom_counts = colocalized_df['chrom'].value_counts().sort_index()
-    ax4.bar(range(len(chrom_counts)), chrom_counts.values, color='#3498db',
-           edgecolor='black', alpha=0.7)
-    ax4.set_xlabel('Chromosome', fontsize=11, fontweight='bold')
-    ax4.set_ylabel('Colocalized site count', fontsize=11, fontweight='bold')
-    ax4.set_title('Chromosomal Distribution of Colocalized Sites',
-                 fontsize=12, fontweight='bold')
-    ax4.set_xticks(range(len(chrom_counts)))
-    ax4.set_xticklabels([c.replace('chr', '') for c in chrom_counts.index],
-                       rotation=45, ha='right')
-    ax4.grid(axis='y', alpha=0.3)
-
-    plt.tight_layout()
-
-    if output_file:
-        plt.savefig(output_file, dpi=300, bbox_inches='tight')
-        logger.info(f"保存共定位特征分析图: {output_file}")
-
-    plt.show()
+    distance_stats, same_strand = summary if summary is not None else summarize_colocalization(colocalized_df)
+
+    # 路径简化只作用于本图：减少密集图形的顶点数，加快Agg渲染
+    with plt.rc_context({'path.simplify': True, 'path.simplify_threshold': 1.0}):
+        fig, axes = plt.subplots(2, 2, figsize=(14, 10))
+
+        # 1. 距离分布
+        ax1 = axes[0, 0]
+        hist_counts, bin_edges = np.histogram(colocalized_df['distance'].to_numpy(), bins=30)
+        ax1.bar(bin_edges[:-1], hist_counts, width=np.diff(bin_edges), align='edge',
+               color='#9b59b6', edgecolor='black', alpha=0.7, rasterized=True)
+        ax1.set_xlabel('Distance between sites (bp)', fontsize=11, fontweight='bold')
+        ax1.set_ylabel('Count', fontsize=11, fontweight='bold')
+        ax1.set_title('Distribution of Distances\nbetween Colocalized Sites',
+                     fontsize=12, fontweight='bold')
+        ax1.axvline(distance_stats['median'], color='red',
+                   linestyle='--', linewidth=2, label=f"Median: {distance_stats['median']:.0f}bp")
+        ax1.legend()
+        ax1.grid(axis='y', alpha=0.3)
+
+        # 2. 特征组合分布
+        ax2 = axes[0, 1]
+        feature_combinations = colocalized_df['psi_feature'] + ' (Ψ) + ' + colocalized_df['m6a_feature'] + ' (m6A)'
+        feature_counts = feature_combinations.value_counts()
+
+        colors = plt.cm.Set3(np.linspace(0, 1, len(feature_counts)))
+        feature_counts.plot(kind='barh', ax=ax2, color=colors, edgecolor='black', rasterized=True)
+        ax2.set_xlabel('Count', fontsize=11, fontweight='bold')
+        ax2.set_title('Feature Combinations at Colocalized Sites',
+                     fontsize=12, fontweight='bold')
+        ax2.grid(axis='x', alpha=0.3)
+
+        # 3. 链方向一致性
+        ax3 = axes[1, 0]
+        n_same = int(same_strand.sum())
+        strand_consistency = [n_same, len(same_strand) - n_same]
+        strand_labels = ['Same strand', 'Different strands']
+        strand_colors = ['#2ecc71', '#e74c3c']
+
+        # 堆积横条代替饼图：两段百分比，一次bar_label标注
+        strand_pct = np.array(strand_consistency) / len(same_strand) * 100
+        strand_bars = ax3.barh([0, 0], strand_pct, left=[0, strand_pct[0]], color=strand_colors,
+                               edgecolor='black', height=0.5, rasterized=True)
+        ax3.bar_label(strand_bars, labels=[f'{p:.1f}%' if p > 0 else '' for p in strand_pct],
+                      label_type='center', fontsize=11, fontweight='bold')
+        ax3.legend(strand_bars, strand_labels, loc='upper center', ncol=2, fontsize=10)
+        ax3.set_xlim(0, 100)
+        ax3.set_ylim(-0.6, 1.0)
+        ax3.set_yticks([])
+        ax3.set_xlabel('Percentage (%)', fontsize=11, fontweight='bold')
+        ax3.set_title('Strand Consistency', fontsize=12, fontweight='bold', pad=15)
+
+        # 4. 染色体分布
+        ax4 = axes[1, 1]
+        chrom_codes = pd.Categorical(colocalized_df['chrom'], categories=CHROM_ORDER).codes
+        chrom_counts = np.bincount(chrom_codes[chrom_codes >= 0], minlength=len(CHROM_ORDER))
+        x = np.arange(len(CHROM_ORDER))
+        ax4.bar(x, chrom_counts, color='#3498db', edgecolor='black', alpha=0.7, rasterized=True)
+        ax4.set_xlabel('Chromosome', fontsize=11, fontweight='bold')
+        ax4.set_ylabel('Colocalized site count', fontsize=11, fontweight='bold')
+        ax4.set_title('Chromosomal Distribution of Colocalized Sites',
+                     fontsize=12, fontweight='bold')
+        ax4.set_xticks(x)
+        ax4.set_xticklabels([c[3:] for c in CHROM_ORDER], rotation=45, ha='right')
+        ax4.grid(axis='y', alpha=0.3)
+
+        fig.tight_layout()
+
+        if output_file:
+            fig.savefig(output_file, dpi=300, bbox_inches='tight', pad_inches=0.05,
+                        pil_kwargs={'compress_level': 6})
+            logger.info(f"保存共定位特征分析图: {output_file}")
+        else:
+            plt.show()
+
+        plt.close(fig)
 
 
 def analyze_colocalization_significance(psi_count: int, m6a_count: int,
@@ -317,15 +373,12 @@ def analyze_colocalization_significance(psi_count: int, m6a_count: int,
         enrichment = overlap_count / expected_overlap
         logger.info(f"  富集倍数: {enrichment:.2f}x")
 
-    # 简单的卡方检验
-    observed = [overlap_count, psi_count - overlap_count]
-    expected = [expected_overlap, psi_count - expected_overlap]
-
-    from scipy import stats
-    chi2, p_value = stats.chisquare(f_obs=observed, f_exp=expected)
+    # 超几何分布上尾概率 P(X >= overlap)：从genome_size个位置中抽取m6a_count个，
+    # 其中psi_count个为Ψ位点（期望值即上面的expected_overlap）
+    from scipy.stats import hypergeom
+    p_value = hypergeom.sf(overlap_count - 1, int(genome_size), psi_count, m6a_count)
 
-    logger.info(f"\n统计检验（卡方检验）:")
-    logger.info(f"  Chi2 = {chi2:.4f}")
+    logger.info(f"\n统计检验（超几何检验）:")
     logger.info(f"  P-value = {p_value:.2e}")
 
     if p_value < 0.001:
@@ -360,8 +413,8 @@ def main():
         logger.error("数据文件不存在！请先运行 1_data_fetching.py")
         return
 
-    psi_df = pd.read_csv(psi_file)
-    m6a_df = pd.read_csv(m6a_file)
+    psi_df = load_cached(psi_file)
+    m6a_df = load_cached(m6a_file)
 
     logger.info(f"\n数据加载:")
     logger.info(f"  Ψ位点: {len(psi_df):,}")
@@ -385,8 +438,10 @@ def main():
     # 4. 如果有共定位位点，分析其特征
     if len(colocalized_df) > 0:
         logger.info("\n[步骤4] 分析共定位位点特征...")
+        summary = summarize_colocalization(colocalized_df)
         plot_colocalization_features(colocalized_df,
-                                    output_file=FIGURES_DIR / "colocalization_features.png")
+                                    output_file=FIGURES_DIR / "colocalization_features.png",
+                                    summary=summary)
 
         # 保存共定位位点信息
         colocalized_file = RESULTS_DIR / "colocalized_sites.csv"
@@ -402,40 +457,36 @@ def main():
 
     # 6. 生成分析报告
     logger.info("\n[步骤6] 生成分析报告...")
-    report = f"""
-{'='*80}
-共定位分析报告
-{'='*80}
-
-位点统计:
-  Ψ位点总数: {len(psi_df):,}
-  m6A位点总数: {len(m6a_df):,}
-  仅Ψ: {psi_only:,} ({psi_only/len(psi_df)*100:.1f}%)
-  仅m6A: {m6a_only:,} ({m6a_only/len(m6a_df)*100:.1f}%)
-  共定位: {overlap:,} ({overlap/len(psi_df)*100:.1f}% of Ψ, {overlap/len(m6a_df)*100:.1f}% of m6A)
-
-共定位位点特征:
-"""
-
+    fields = {
+        'rule': '=' * 80,
+        'n_psi': len(psi_df),
+        'n_m6a': len(m6a_df),
+        'psi_only': psi_only,
+        'm6a_only': m6a_only,
+        'overlap': overlap,
+        'psi_only_pct': psi_only / len(psi_df) * 100,
+        'm6a_only_pct': m6a_only / len(m6a_df) * 100,
+        'overlap_psi_pct': overlap / len(psi_df) * 100,
+        'overlap_m6a_pct': overlap / len(m6a_df) * 100,
+    }
+    sections = [REPORT_HEADER]
     if len(colocalized_df) > 0:
-        report += f"""
-  - 平均距离: {colocalized_df['distance'].mean():.1f} ± {colocalized_df['distance'].std():.1f} bp
-  - 中位数距离: {colocalized_df['distance'].median():.0f} bp
-  - 最大距离: {colocalized_df['distance'].max():.0f} bp
-  - 最小距离: {colocalized_df['distance'].min():.0f} bp
-  - 链方向一致: {(colocalized_df['psi_strand'] == colocalized_df['m6a_strand']).sum()}/{len(colocalized_df)} ({(colocalized_df['psi_strand'] == colocalized_df['m6a_strand']).sum()/len(colocalized_df)*100:.1f}%)
-"""
+        distance_stats, same_strand = summary
+        fields.update(distance_stats.to_dict())
+        fields.update(n_same=same_strand.sum(), n_pairs=len(same_strand),
+                      same_pct=same_strand.mean() * 100)
+        sections.append(REPORT_FEATURES)
     else:
-        report += "\n  未检测到共定位位点\n"
+        sections.append(REPORT_NO_COLOCALIZATION)
+    sections.append(REPORT_FOOTER)
 
-    report += f"\n{'='*80}\n"
+    report = ''.join(sections).format_map(fields)
 
     logger.info(report)
 
     # 保存报告
     report_file = RESULTS_DIR / "colocalization_report.txt"
-    with open(report_file, 'w') as f:
-        f.write(report)
+    report_file.write_text(report, encoding='utf-8')
     logger.info(f"保存报告: {report_file}")
 
     logger.info("\n" + "=" * 80)
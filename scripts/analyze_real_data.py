@@ -8,12 +8,95 @@
 
 import pandas as pd
 import numpy as np
+import matplotlib
+matplotlib.use('Agg')  # 批处理脚本，无需GUI后端
 import matplotlib.pyplot as plt
 import seaborn as sns
 from pathlib import Path
-from matplotlib_venn import venn2
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from scipy.stats import chi2_contingency, mannwhitneyu
 
+from site_io import CHROM_ORDER, load_cached
+from viz import plot_venn_diagram
+
+try:
+    from numba import njit, prange
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+# PNG保存参数：单遍zlib压缩、较小的留白
+SAVEFIG_KWARGS = dict(dpi=300, bbox_inches='tight', pad_inches=0.05,
+                      pil_kwargs={'compress_level': 6})
+
+
+if HAS_NUMBA:
+    @njit(parallel=True)
+    def _expand_ranges(lo, hi):
+        """
+        将每个query的命中区间[lo[i], hi[i])展开为下标对（numba编译，按query并行填充）
+        """
+        n = len(lo)
+        starts = np.empty(n + 1, dtype=np.int64)
+        starts[0] = 0
+        for i in range(n):
+            starts[i + 1] = starts[i] + (hi[i] - lo[i])
+
+        query_idx = np.empty(starts[n], dtype=np.int64)
+        sorted_idx = np.empty(starts[n], dtype=np.int64)
+        for i in prange(n):
+            for k in range(hi[i] - lo[i]):
+                query_idx[starts[i] + k] = i
+                sorted_idx[starts[i] + k] = lo[i] + k
+        return query_idx, sorted_idx
+else:
+    def _expand_ranges(lo, hi):
+        """
+        将每个query的命中区间[lo[i], hi[i])展开为下标对（NumPy实现）
+        """
+        n_hits = hi - lo
+        query_idx = np.repeat(np.arange(len(lo), dtype=np.int64), n_hits)
+        offsets = np.repeat(lo - (np.cumsum(n_hits) - n_hits), n_hits)
+        return query_idx, offsets + np.arange(n_hits.sum())
+
+
+def _window_pairs(query: np.ndarray, sorted_target: np.ndarray, window):
+    """
+    找出所有满足 |query[i] - sorted_target[j]| <= window 的下标对
+
+    sorted_target须已升序排列；每个query位点用两次二分查找得到窗口内的连续区间，
+    再由_expand_ranges展开为下标对，不需要逐行循环
+
+    返回：
+    - (query下标数组, sorted_target下标数组)，按query下标升序排列
+    """
+    lo = np.searchsorted(sorted_target, query - window, side='left')
+    hi = np.searchsorted(sorted_target, query + window, side='right')
+
+    return _expand_ranges(lo, hi)
+
+
+def _narrow_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    压缩列类型以减少内存和连接时的读取量：
+    位置列 -> int32（人类染色体长度 < 2^31），score -> float32，chrom -> 分类类型
+    （分类类型使后续的染色体编码只需处理类别而非逐行字符串）
+
+    fdr保持float64：REPIC中的FDR可低至1e-265，float32会下溢为0
+    """
+    for col in ('start', 'end', 'peak_pos', 'center'):
+        if col in df.columns and pd.api.types.is_integer_dtype(df[col]):
+            df[col] = df[col].astype(np.int32)
+    if 'score' in df.columns and pd.api.types.is_float_dtype(df['score']):
+        df['score'] = df['score'].astype(np.float32)
+    if 'chrom' in df.columns:
+        # 非标准contig追加在标准染色体之后，避免被置为缺失值
+        extra = sorted(set(df['chrom'].dropna().unique()) - set(CHROM_ORDER))
+        df['chrom'] = pd.Categorical(df['chrom'], categories=CHROM_ORDER + extra)
+    return df
+
+
 class RealDataAnalyzer:
     def __init__(self, project_dir: Path):
         self.project_dir = Path(project_dir)
@@ -27,20 +110,47 @@ class RealDataAnalyzer:
         plt.rcParams['font.sans-serif'] = ['DejaVu Sans']
         plt.rcParams['axes.unicode_minus'] = False
 
+        # 按染色体缓存的m6A排序中心位置（见_sorted_m6a_centers）
+        self._m6a_sorted = None
+        self._m6a_sorted_source = None
+
     def load_data(self):
         """加载解析后的数据"""
         print("\n=== 加载数据 ===")
 
         # 加载Ψ数据
         psi_csv = self.results_dir / "psi_real_full.csv"
-        self.psi_df = pd.read_csv(psi_csv)
+        self.psi_df = _narrow_dtypes(load_cached(psi_csv))
         print(f"Ψ位点: {len(self.psi_df)}")
 
         # 加载m6A数据
         m6a_csv = self.results_dir / "m6a_real_full.csv"
-        self.m6a_df = pd.read_csv(m6a_csv)
+        self.m6a_df = _narrow_dtypes(load_cached(m6a_csv))
         print(f"m6A位点: {len(self.m6a_df)}")
 
+        self._encode_chroms()
+
+    def _encode_chroms(self):
+        """
+        将两组数据的染色体名映射为共用的整数编码chrom_code（忽略"chr"前缀，
+        使"1"与"chr1"对应同一编码）；只对分类类别做字符串处理，不逐行处理
+        """
+        cats = [pd.Categorical(df['chrom']) for df in (self.psi_df, self.m6a_df)]
+
+        names = [c.replace('chr', '') for c in CHROM_ORDER]
+        names += sorted({str(c).replace('chr', '') for cat in cats for c in cat.categories}
+                        - set(names))
+        code_of = {name: i for i, name in enumerate(names)}
+        code_dtype = np.int8 if len(names) < 128 else np.int16
+
+        for df, cat in zip((self.psi_df, self.m6a_df), cats):
+            # 末尾的-1对应缺失染色体（categorical code为-1）
+            lookup = np.array([code_of[str(c).replace('chr', '')] for c in cat.categories] + [-1],
+                              dtype=code_dtype)
+            df['chrom_code'] = lookup[cat.codes]
+        self.chrom_names = names
+        self._m6a_sorted = None
+
     def normalize_regions(self):
         """
         标准化region名称
@@ -49,36 +159,11 @@ class RealDataAnalyzer:
         print("\n=== 标准化区域名称 ===")
 
         # 对于Ψ数据
-        def simplify_region_psi(region):
-            if 'utr3' in region.lower():
-                return '3\'UTR'
-            elif 'utr5' in region.lower():
-                return '5\'UTR'
-            elif 'cds' in region.lower():
-                return 'CDS'
-            else:
-                return 'Other'
-
-        self.psi_df['region_simple'] = self.psi_df['region'].apply(simplify_region_psi)
-
-        # 对于m6A数据（可能包含组合区域）
-        def simplify_region_m6a(region):
-            if not isinstance(region, str):
-                return 'Other'
-
-            region_lower = region.lower()
-            if 'utr3' in region_lower:
-                return '3\'UTR'
-            elif 'utr5' in region_lower:
-                return '5\'UTR'
-            elif 'cds' in region_lower:
-                return 'CDS'
-            elif 'exon' in region_lower and 'cds' not in region_lower:
-                return 'CDS'  # exon通常属于CDS
-            else:
-                return 'Other'
-
-        self.m6a_df['region_simple'] = self.m6a_df['region'].apply(simplify_region_m6a)
+        self.psi_df['region_simple'] = self._simplify_regions(self.psi_df['region'])
+
+        # 对于m6A数据（可能包含组合区域，exon通常属于CDS）
+        self.m6a_df['region_simple'] = self._simplify_regions(self.m6a_df['region'],
+                                                             exon_as_cds=True)
 
         # 统计
         print("Ψ区域分布:")
@@ -87,6 +172,23 @@ class RealDataAnalyzer:
         print("\nm6A区域分布:")
         print(self.m6a_df['region_simple'].value_counts())
 
+    @staticmethod
+    def _simplify_regions(regions: pd.Series, exon_as_cds: bool = False) -> np.ndarray:
+        """
+        向量化地将region归类为3'UTR/5'UTR/CDS/Other（优先级依次递减，缺失值归为Other）
+        """
+        lower = regions.astype('string').str.lower()
+        conditions = [lower.str.contains('utr3', regex=False, na=False),
+                      lower.str.contains('utr5', regex=False, na=False),
+                      lower.str.contains('cds', regex=False, na=False)]
+        choices = ['3\'UTR', '5\'UTR', 'CDS']
+        if exon_as_cds:
+            conditions.append(lower.str.contains('exon', regex=False, na=False))
+            choices.append('CDS')
+
+        return np.select([c.to_numpy(dtype=bool) for c in conditions], choices,
+                         default='Other').astype(object)
+
     def metagene_analysis(self):
         """Metagene profile分析"""
         print("\n=== Metagene Profile分析 ===")
@@ -140,46 +242,60 @@ class RealDataAnalyzer:
         """
         print(f"\n=== 共定位分析 (窗口: ±{window}bp) ===")
 
-        # 标准化染色体名称
-        self.psi_df['chrom_std'] = self.psi_df['chrom'].str.replace('chr', '')
-        self.m6a_df['chrom_std'] = self.m6a_df['chrom'].str.replace('chr', '')
+        # 染色体整数编码（load_data中已生成；直接赋值数据时在此补上）
+        if 'chrom_code' not in self.psi_df.columns or 'chrom_code' not in self.m6a_df.columns:
+            self._encode_chroms()
 
         # 计算中点位置
         self.psi_df['center'] = (self.psi_df['start'] + self.psi_df['end']) // 2
         self.m6a_df['center'] = self.m6a_df['peak_pos']
 
-        colocalized = 0
-        colocalized_pairs = []
-
-        # 只分析相同染色体
-        for chrom in set(self.psi_df['chrom_std']) & set(self.m6a_df['chrom_std']):
-            psi_chrom = self.psi_df[self.psi_df['chrom_std'] == chrom]
-            m6a_chrom = self.m6a_df[self.m6a_df['chrom_std'] == chrom]
-
-            for _, psi_row in psi_chrom.iterrows():
-                psi_pos = psi_row['center']
-
-                # 找到m6A在窗口内的位点
-                nearby = m6a_chrom[
-                    abs(m6a_chrom['center'] - psi_pos) <= window
-                ]
-
-                if len(nearby) > 0:
-                    colocalized += len(nearby)
-                    for _, m6a_row in nearby.iterrows():
-                        colocalized_pairs.append({
-                            'chrom': chrom,
-                            'psi_pos': psi_pos,
-                            'm6a_pos': m6a_row['center'],
-                            'distance': abs(psi_pos - m6a_row['center'])
-                        })
-
-        colocal_df = pd.DataFrame(colocalized_pairs)
+        psi_centers = self.psi_df['center'].to_numpy()
+        m6a_sorted = self._sorted_m6a_centers()
+
+        chrom_parts, psi_parts, m6a_parts = [], [], []
+        # 参与共定位的位点（按行标记，用于韦恩图计数）
+        psi_hit = np.zeros(len(self.psi_df), dtype=bool)
+        m6a_hit = np.zeros(len(self.m6a_df), dtype=bool)
+
+        # 只分析相同染色体（按染色体编号顺序输出）
+        for code, psi_idx in self.psi_df.groupby('chrom_code').indices.items():
+            if code < 0 or code not in m6a_sorted:
+                continue
+            m6a_order, m6a_centers = m6a_sorted[code]
+
+            # 找到m6A在窗口内的位点，按(Ψ, m6A)原始行顺序排列
+            q, t = _window_pairs(psi_centers[psi_idx], m6a_centers, window)
+            keep = np.lexsort((m6a_order[t], q))
+            q, t = q[keep], t[keep]
+            psi_hit[psi_idx[q]] = True
+            m6a_hit[m6a_order[t]] = True
+
+            chrom_parts.append(np.full(len(q), self.chrom_names[code], dtype=object))
+            psi_parts.append(psi_centers[psi_idx[q]])
+            m6a_parts.append(m6a_centers[t])
+
+        if psi_parts:
+            psi_pos = np.concatenate(psi_parts)
+            m6a_pos = np.concatenate(m6a_parts)
+            colocal_df = pd.DataFrame({
+                'chrom': np.concatenate(chrom_parts),
+                'psi_pos': psi_pos,
+                'm6a_pos': m6a_pos,
+                'distance': np.abs(psi_pos - m6a_pos)
+            })
+        else:
+            colocal_df = pd.DataFrame()
+        colocalized = len(colocal_df)
+
+        # 韦恩图计数：共定位计为涉及的Ψ位点数，与4_venn_analysis.get_venn_counts一致
+        overlap = int(psi_hit.sum())
+        self.venn_counts = (len(self.psi_df) - overlap, len(self.m6a_df) - int(m6a_hit.sum()), overlap)
 
         print(f"Ψ位点总数: {len(self.psi_df)}")
         print(f"m6A位点总数: {len(self.m6a_df)}")
         print(f"共定位事件: {colocalized}")
-        print(f"涉及Ψ位点: {len(colocal_df['psi_pos'].unique()) if len(colocal_df) > 0 else 0}")
+        print(f"涉及Ψ位点: {overlap}")
 
         # 保存结果
         if len(colocal_df) > 0:
@@ -189,6 +305,23 @@ class RealDataAnalyzer:
 
         return colocalized, len(self.psi_df), len(self.m6a_df)
 
+    def _sorted_m6a_centers(self):
+        """
+        按染色体编码缓存m6A中心位置的排序数组，只构建一次，之后的查询直接复用
+
+        返回：
+        - {chrom_code: (按中心位置排序的行下标, 排序后的中心位置)}
+        """
+        # m6a_df被整体替换时重建
+        if self._m6a_sorted is None or self._m6a_sorted_source is not self.m6a_df:
+            centers = self.m6a_df['center'].to_numpy()
+            self._m6a_sorted = {}
+            self._m6a_sorted_source = self.m6a_df
+            for code, idx in self.m6a_df.groupby('chrom_code', sort=False).indices.items():
+                order = idx[np.argsort(centers[idx], kind='stable')]
+                self._m6a_sorted[code] = (order, centers[order])
+        return self._m6a_sorted
+
     def plot_metagene_comparison(self, comparison_df, p_value):
         """绘制Metagene对比图"""
         fig, axes = plt.subplots(1, 3, figsize=(18, 5))
@@ -210,51 +343,29 @@ class RealDataAnalyzer:
         axes[1].grid(axis='y', alpha=0.3)
         axes[1].set_xlabel('Modification', fontsize=12)
 
-        # 3. 饼图
+        # 3. 各修饰的区域占比（横条图代替饼图，Agg下渲染更快）
         fig_pie, axes_pie = plt.subplots(1, 2, figsize=(14, 6))
+        region_colors = ['#2ecc71', '#f39c12', '#9b59b6']
 
-        for idx, (mod, color) in enumerate([('Pseudouridine (Ψ)', '#3498db'),
-                                            ('m6A', '#e74c3c')]):
+        for idx, mod in enumerate(['Pseudouridine (Ψ)', 'm6A']):
             data = comparison_df[mod]
-            axes_pie[idx].pie(data, labels=data.index, autopct='%1.1f%%',
-                             colors=['#2ecc71', '#f39c12', '#9b59b6'],
-                             startangle=90)
+            pct = data.to_numpy(dtype=float) / max(data.sum(), 1e-12) * 100
+            bars = axes_pie[idx].barh(data.index, pct, color=region_colors, edgecolor='black')
+            axes_pie[idx].bar_label(bars, labels=[f'{p:.1f}%' for p in pct], padding=3, fontsize=11)
+            axes_pie[idx].set_xlim(0, max(pct.max() * 1.15, 1))
+            axes_pie[idx].invert_yaxis()
+            axes_pie[idx].set_xlabel('Percentage (%)', fontsize=12)
             axes_pie[idx].set_title(f'{mod} Distribution', fontsize=14, fontweight='bold')
 
-        plt.tight_layout()
-        fig_pie.savefig(self.figures_dir / "metagene_piecharts_real.png", dpi=300, bbox_inches='tight')
+        fig_pie.tight_layout()
+        fig_pie.savefig(self.figures_dir / "metagene_piecharts_real.png", **SAVEFIG_KWARGS)
         print(f"\n饼图已保存: metagene_piecharts_real.png")
+        plt.close(fig_pie)
 
-        plt.tight_layout()
-        fig.savefig(self.figures_dir / "metagene_comparison_real.png", dpi=300, bbox_inches='tight')
+        fig.tight_layout()
+        fig.savefig(self.figures_dir / "metagene_comparison_real.png", **SAVEFIG_KWARGS)
         print(f"对比图已保存: metagene_comparison_real.png")
-
-        plt.close('all')
-
-    def plot_venn_diagram(self, colocalized, n_psi, n_m6a):
-        """绘制韦恩图"""
-        fig, ax = plt.subplots(figsize=(10, 8))
-
-        # 计算不重叠的数量
-        psi_only = n_psi - min(colocalized, n_psi)  # 粗略估计
-        m6a_only = n_m6a - min(colocalized, n_m6a)  # 粗略估计
-        overlap = min(colocalized, min(n_psi, n_m6a))  # 保守估计
-
-        venn = venn2(subsets=(psi_only, m6a_only, overlap),
-                     set_labels=('Pseudouridine (Ψ)', 'm6A'),
-                     ax=ax)
-
-        venn.get_label_by_id('10').set_text(f'{psi_only}\nΨ only')
-        venn.get_label_by_id('01').set_text(f'{m6a_only}\nm6A only')
-        venn.get_label_by_id('11').set_text(f'{overlap}\nColocalized')
-
-        ax.set_title('Colocalization Analysis (±50bp window)',
-                    fontsize=16, fontweight='bold', pad=20)
-
-        plt.savefig(self.figures_dir / "venn_diagram_real.png", dpi=300, bbox_inches='tight')
-        print(f"\n韦恩图已保存: venn_diagram_real.png")
-
-        plt.close()
+        plt.close(fig)
 
     def generate_summary_report(self):
         """生成汇总报告"""
@@ -288,6 +399,18 @@ class RealDataAnalyzer:
         print(f"\n报告已保存: analysis_summary_real.txt")
 
 
+def _render_figure(plot_method, project_dir, *args):
+    """
+    子进程入口：用不含位点表的RealDataAnalyzer绘制一张图（只传递聚合后的小数据）
+
+    参数：
+    - plot_method: RealDataAnalyzer的绘图方法（未绑定）
+    - project_dir: 项目目录
+    - args: 绘图方法的参数
+    """
+    plot_method(RealDataAnalyzer(project_dir), *args)
+
+
 def main():
     """主函数"""
     project_dir = Path("/home/tony/m6A/RNA_modification_analysis")
@@ -307,12 +430,22 @@ def main():
     comparison_df, p_value = analyzer.metagene_analysis()
 
     # 4. 共定位分析
-    colocalized, n_psi, n_m6a = analyzer.colocalization_analysis(window=50)
+    analyzer.colocalization_analysis(window=50)
 
     # 5. 绘图
     print("\n=== 生成可视化 ===")
-    analyzer.plot_metagene_comparison(comparison_df, p_value)
-    analyzer.plot_venn_diagram(colocalized, n_psi, n_m6a)
+    # 各图相互独立，在子进程中并行渲染；用spawn启动子进程，
+    # 避免fork继承共定位阶段numba并行线程池的锁状态而死锁
+    with ProcessPoolExecutor(max_workers=2,
+                             mp_context=multiprocessing.get_context('spawn')) as executor:
+        futures = [
+            executor.submit(_render_figure, RealDataAnalyzer.plot_metagene_comparison,
+                            analyzer.project_dir, comparison_df, p_value),
+            executor.submit(plot_venn_diagram, *analyzer.venn_counts,
+                            output_file=analyzer.figures_dir / "venn_diagram_real.png"),
+        ]
+        for future in as_completed(futures):
+            future.result()
 
     # 6. 生成报告
     print("\n=== 生成报告 ===")
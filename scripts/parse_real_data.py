@@ -9,8 +9,18 @@ import pandas as pd
 import numpy as np
 import gzip
 import os
+import re
 from pathlib import Path
 
+try:
+    import polars as pl
+    HAS_POLARS = True
+except ImportError:
+    HAS_POLARS = False
+
+# REPIC位置字段: chr1:629848-630037[+]（模块加载时编译一次）
+POS_RE = re.compile(r'^(?P<chrom>[^:]+):(?P<start>\d+)-(?P<end>\d+)\[(?P<strand>[^:\[]*?)\]*$')
+
 class RealDataParser:
     def __init__(self, project_dir: Path):
         self.project_dir = Path(project_dir)
@@ -32,67 +42,16 @@ class RealDataParser:
         print(f"\n=== 解析m6A REPIC数据 ===")
         print(f"输入文件: {gz_file}")
 
-        # 读取并解析数据
-        sites = []
-        skipped = 0
-
         with gzip.open(gz_file, 'rt') as f:
             header = f.readline().strip().split('\t')
-            print(f"列名: {header}")
-
-            pos_idx = header.index('pos')
-            fdr_idx = header.index('fdr')
-            region_idx = header.index('region')
-            gene_idx = header.index('geneid')
-
-            for line_num, line in enumerate(f, 2):
-                try:
-                    cols = line.strip().split('\t')
-                    if len(cols) < len(header):
-                        skipped += 1
-                        continue
-
-                    pos_str = cols[pos_idx]
-                    fdr = float(cols[fdr_idx])
-                    region = cols[region_idx]
-                    gene_id = cols[gene_idx]
-
-                    # FDR过滤
-                    if fdr > fdr_threshold:
-                        skipped += 1
-                        continue
-
-                    # 解析染色体位置: chr1:629848-630037[+]
-                    # 提取中间点作为peak位置
-                    try:
-                        chr_part, rest = pos_str.split(':')
-                        range_part, strand = rest.split('[')
-                        strand = strand.rstrip(']')
-
-                        start, end = map(int, range_part.split('-'))
-                        peak_pos = (start + end) // 2  # 使用中点
-
-                        sites.append({
-                            'chrom': chr_part,
-                            'start': start,
-                            'end': end,
-                            'peak_pos': peak_pos,
-                            'strand': strand,
-                            'fdr': fdr,
-                            'region': region,
-                            'gene_id': gene_id,
-                            'score': 1 - fdr  # 转换为得分
-                        })
-                    except Exception as e:
-                        skipped += 1
-                        continue
+        print(f"列名: {header}")
 
-                except Exception as e:
-                    if line_num % 100000 == 0:
-                        print(f"处理到第 {line_num} 行...")
-                    continue
+        if HAS_POLARS:
+            df, n_rows = self._read_repic_polars(gz_file, fdr_threshold)
+        else:
+            df, n_rows = self._read_repic_pandas(gz_file, fdr_threshold)
+        skipped = n_rows - len(df)
 
-        df = pd.DataFrame(sites)
         print(f"\n解析完成:")
         print(f"  - 有效位点: {len(df)}")
         print(f"  - 跳过行数: {skipped}")
@@ -110,6 +69,79 @@ class RealDataParser:
 
         return df
 
+    @staticmethod
+    def _read_repic_polars(gz_file: str, fdr_threshold: float):
+        """
+        用polars惰性扫描读取REPIC表：FDR过滤下推到扫描阶段，位置解析在Rust中完成
+
+        返回：
+        - (位点DataFrame, 原始行数)
+        """
+        lf = pl.scan_csv(gz_file, separator='\t', infer_schema=False)
+        sites = (
+            lf.select(pl.col('pos'), pl.col('fdr').cast(pl.Float64, strict=False),
+                      pl.col('region'), pl.col('geneid').alias('gene_id'))
+            # 列数不足的行（缺少region/geneid字段）视为无效行
+            .filter((pl.col('fdr') <= fdr_threshold) & pl.col('region').is_not_null()
+                    & pl.col('gene_id').is_not_null())
+            .with_columns(pl.col('pos').str.extract_groups(POS_RE.pattern).alias('p'))
+            .unnest('p')
+            .filter(pl.col('chrom').is_not_null())
+            .with_columns(pl.col('start').cast(pl.Int64), pl.col('end').cast(pl.Int64))
+            .select(
+                'chrom', 'start', 'end',
+                ((pl.col('start') + pl.col('end')) // 2).alias('peak_pos'),  # 使用中点作为peak位置
+                'strand', 'fdr', 'region', 'gene_id',
+                (1 - pl.col('fdr')).alias('score')  # 转换为得分
+            )
+        )
+        counts, sites = pl.collect_all([lf.select(pl.len()), sites])
+        return sites.to_pandas(), counts.item()
+
+    @staticmethod
+    def _read_repic_pandas(gz_file: str, fdr_threshold: float):
+        """
+        用pandas读取REPIC表（未安装polars时使用）
+
+        返回：
+        - (位点DataFrame, 原始行数)
+        """
+        # 一次性读取所需列（zlib解压和分列都在C中完成）
+        raw = pd.read_csv(gz_file, sep='\t', compression='gzip',
+                          usecols=['pos', 'fdr', 'region', 'geneid'],
+                          dtype={'pos': str, 'region': str, 'geneid': str})
+        n_rows = len(raw)
+
+        # 列数不足的行（缺少region/geneid字段）视为无效行
+        raw = raw.dropna(subset=['region', 'geneid'])
+
+        # FDR过滤（无法解析的FDR视为无效行）
+        fdr = pd.to_numeric(raw['fdr'], errors='coerce')
+        raw = raw[fdr <= fdr_threshold]
+        fdr = fdr[raw.index]
+
+        # 解析染色体位置
+        parts = raw['pos'].str.extract(POS_RE)
+        valid = parts['chrom'].notna().to_numpy()
+        parts = parts[valid]
+
+        start = parts['start'].to_numpy(dtype=np.int64)
+        end = parts['end'].to_numpy(dtype=np.int64)
+        fdr = fdr[valid].to_numpy(dtype=np.float64)
+
+        df = pd.DataFrame({
+            'chrom': parts['chrom'].to_numpy(),
+            'start': start,
+            'end': end,
+            'peak_pos': (start + end) // 2,  # 使用中点作为peak位置
+            'strand': parts['strand'].to_numpy(),
+            'fdr': fdr,
+            'region': raw['region'].to_numpy()[valid],
+            'gene_id': raw['geneid'].to_numpy()[valid],
+            'score': 1 - fdr  # 转换为得分
+        })
+        return df, n_rows
+
     def save_m6a_bed(self, df: pd.DataFrame, output_file: str):
         """保存为BED格式"""
         print(f"\n保存m6A数据到: {output_file}")
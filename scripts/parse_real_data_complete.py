@@ -8,10 +8,99 @@
 
 import pandas as pd
 import numpy as np
-import gzip
+import csv
+import multiprocessing
+import os
 import re
+from functools import lru_cache
 from pathlib import Path
 from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from site_io import HAS_PYARROW, save_cached, write_bed
+
+# ISA-L（SIMD加速的inflate）比标准库zlib快2-3倍，未安装时退回标准库gzip
+try:
+    from isal import igzip as gzip_mod
+except ImportError:
+    import gzip as gzip_mod
+
+# polars可选：安装时用其多线程CSV读取器解析（Rust实现，比pandas快一个数量级）
+try:
+    import polars as pl
+    HAS_POLARS = True
+except ImportError:
+    HAS_POLARS = False
+
+# rapidgzip可多线程并行解压单个gzip流（可选）
+try:
+    import rapidgzip
+    HAS_RAPIDGZIP = True
+except ImportError:
+    HAS_RAPIDGZIP = False
+
+# RMBase BED15+中需要读取的列号及对应列名
+RMBASE_USECOLS = [0, 1, 2, 3, 4, 5, 8, 11, 12, 13]
+RMBASE_NAMES = ['chrom', 'start', 'end', 'site_id', 'score', 'strand',
+                'support_num', 'gene_name', 'gene_type', 'region']
+
+# REPIC表中需要读取的列
+REPIC_COLUMNS = ['pos', 'pvalue', 'fdr', 'fold_enrichment', 'region', 'geneid']
+
+# REPIC位置字段: chr1:629848-630037[+]（模块加载时编译一次）
+POS_RE = re.compile(r'^(?P<chrom>chr\w+):(?P<start>\d+)-(?P<end>\d+)\[(?P<strand>[+-])\]')
+
+
+def open_gz(gz_file):
+    """
+    以二进制流打开gzip文件，供pandas读取
+
+    多核机器上优先使用rapidgzip多线程解压，其次ISA-L，最后标准库gzip
+    （单核时rapidgzip的分块开销反而比ISA-L慢）
+    """
+    if HAS_RAPIDGZIP and (os.cpu_count() or 1) > 1:
+        return rapidgzip.open(str(gz_file), parallelization=os.cpu_count())
+    return gzip_mod.open(gz_file, 'rb')
+
+
+@lru_cache(maxsize=64)
+def _norm_chrom(chrom: str) -> str:
+    """去掉染色体名中的"chr"（染色体名只有几十种，结果缓存复用）"""
+    return chrom.replace('chr', '')
+
+
+def sample_sites(df: pd.DataFrame, n: int, seed: int = 42) -> pd.DataFrame:
+    """
+    无放回随机抽取n行：只对行号抽样再按行号取出，保持原文件中的顺序
+
+    参数：
+    - df: 位点表
+    - n: 抽取的行数（不超过len(df)）
+    - seed: 随机种子
+    """
+    idx = np.random.default_rng(seed).choice(len(df), size=n, replace=False)
+    idx.sort()
+    return df.take(idx).reset_index(drop=True)
+
+
+def _print_summary(df: pd.DataFrame, cap: int = 200_000):
+    """
+    打印染色体与区域分布（前10项）
+
+    行数超过cap时只在随机抽取的cap行上计数，避免仅为打印而遍历整张表
+    """
+    if len(df) > cap:
+        df = sample_sites(df, cap, seed=0)
+        print(f"\n（以下分布基于随机抽取的 {cap:,} 个位点）")
+
+    print(f"\n染色体分布:")
+    for chrom, count in df['chrom'].value_counts().head(10).items():
+        print(f"  {chrom}: {count:,}")
+
+    print(f"\n区域分布:")
+    for region, count in df['region'].value_counts().head(10).items():
+        print(f"  {region}: {count:,}")
+
 
 class RealDataParser:
     def __init__(self, project_dir: Path):
@@ -23,7 +112,8 @@ class RealDataParser:
 
     def parse_psi_rmbase(self, gz_file: str,
                          min_support: int = 1,
-                         max_sites: int = 10000) -> pd.DataFrame:
+                         max_sites: int = 10000,
+                         verbose: bool = False) -> pd.DataFrame:
         """
         解析RMBase Ψ数据
 
@@ -34,99 +124,56 @@ class RealDataParser:
         print(f"\n=== 解析RMBase Ψ数据 ===")
         print(f"输入文件: {gz_file}")
 
-        sites = []
-        total_lines = 0
-        skipped_non_coding = 0
-
-        with gzip.open(gz_file, 'rt') as f:
-            # 跳过注释行
-            for line in f:
-                if line.startswith('##'):
-                    continue
-                elif line.startswith('#chromosome'):
-                    # 表头行
-                    headers = line.strip().split('\t')
-                    print(f"列名: {headers}")
-                    continue
-                else:
-                    break
-
-            # 解析数据行
-            for line in f:
-                total_lines += 1
-                cols = line.strip().split('\t')
-
-                if len(cols) < 14:
-                    continue
-
-                try:
-                    chrom = cols[0]
-                    start = int(cols[1])
-                    end = int(cols[2])
-                    site_id = cols[3]
-                    score = float(cols[4]) if cols[4] != '.' else 0
-                    strand = cols[5]
-                    gene_name = cols[11]
-                    gene_type = cols[12]
-                    region = cols[13]
-
-                    # 只保留protein-coding基因
-                    if gene_type != 'protein_coding':
-                        skipped_non_coding += 1
-                        continue
-
-                    # 过滤支持数
-                    support_num = int(cols[8]) if cols[8].isdigit() else 1
-                    if support_num < min_support:
-                        continue
-
-                    sites.append({
-                        'chrom': chrom,
-                        'start': start,
-                        'end': end,
-                        'site_id': site_id,
-                        'score': score,
-                        'strand': strand,
-                        'gene_name': gene_name,
-                        'gene_type': gene_type,
-                        'region': region,
-                        'support_num': support_num
-                    })
-
-                except Exception as e:
-                    if total_lines % 1000 == 0:
-                        print(f"处理到第 {total_lines} 行...")
-                    continue
-
-        df = pd.DataFrame(sites)
-        print(f"\n解析完成:")
-        print(f"  - 总行数: {total_lines:,}")
-        print(f"  - protein-coding位点: {len(df):,}")
-        print(f"  - 跳过非编码位点: {skipped_non_coding:,}")
+        # 相同输入与过滤参数的解析结果缓存为Parquet，源文件未更新时直接读取
+        cache = self._parse_cache_path(gz_file, f'support{min_support}')
+        df = self._load_parse_cache(cache, gz_file)
+        if df is None:
+            # 只扫描文件头部：跳过注释行以及开头列数不足的行（polars按首个数据行推断列数），
+            # 数据部分交给polars/pandas解析
+            n_header = 0
+            with gzip_mod.open(gz_file, 'rt') as f:
+                for line in f:
+                    if line.startswith('#chromosome'):
+                        # 表头行
+                        headers = line.strip().split('\t')
+                        print(f"列名: {headers}")
+                    elif not line.startswith('#') and line.count('\t') >= max(RMBASE_USECOLS):
+                        break
+                    n_header += 1
+
+            if HAS_POLARS:
+                df, total_lines, skipped_non_coding = self._read_rmbase_polars(
+                    gz_file, n_header, min_support)
+            else:
+                df, total_lines, skipped_non_coding = self._read_rmbase_pandas(
+                    gz_file, n_header, min_support)
+
+            print(f"\n解析完成:")
+            print(f"  - 总行数: {total_lines:,}")
+            print(f"  - protein-coding位点: {len(df):,}")
+            print(f"  - 跳过非编码位点: {skipped_non_coding:,}")
+
+            self._save_parse_cache(df, cache)
 
         # 随机采样（如果位点数太多）
         if len(df) > max_sites:
             print(f"\n位点数过多，进行随机采样:")
             print(f"  - 当前: {len(df):,}")
             print(f"  - 目标: {max_sites:,}")
-            df = df.sample(n=max_sites, random_state=42)
+            df = sample_sites(df, max_sites)
             print(f"  - 采样后: {len(df):,}")
 
         # 统计信息
-        print(f"\n染色体分布:")
-        for chrom, count in df['chrom'].value_counts().head(10).items():
-            print(f"  {chrom}: {count:,}")
-
-        print(f"\n区域分布:")
-        for region, count in df['region'].value_counts().head(10).items():
-            print(f"  {region}: {count:,}")
+        if verbose:
+            _print_summary(df)
 
         return df
 
     def parse_m6a_repic(self, gz_file: str,
                        fdr_threshold: float = 0.01,
                        fold_enrichment_threshold: float = 10.0,
-                       max_sites: int = 10000) -> pd.DataFrame:
+                       max_sites: int = 10000,
+                       verbose: bool = False) -> pd.DataFrame:
         """
         解析REPIC m6A数据
 
@@ -137,104 +184,265 @@ class RealDataParser:
         print(f"\n=== 解析REPIC m6A数据 ===")
         print(f"输入文件: {gz_file}")
 
-        sites = []
-        skipped_fdr = 0
-        skipped_enrichment = 0
-
-        with gzip.open(gz_file, 'rt') as f:
-            header = f.readline().strip().split('\t')
-
-            pos_idx = header.index('pos')
-            pvalue_idx = header.index('pvalue')
-            fdr_idx = header.index('fdr')
-            fold_idx = header.index('fold_enrichment')
-            region_idx = header.index('region')
-            gene_idx = header.index('geneid')
-
-            line_num = 1
-            for line in f:
-                line_num += 1
-                try:
-                    cols = line.strip().split('\t')
-                    if len(cols) < len(header):
-                        continue
-
-                    # 解析位置: chr1:629848-630037[+]
-                    pos_str = cols[pos_idx]
-                    match = re.match(r'(chr\w+):(\d+)-(\d+)\[(\+|\-)\]', pos_str)
-                    if not match:
-                        continue
-
-                    chrom = match.group(1)
-                    start = int(match.group(2))
-                    end = int(match.group(3))
-                    strand = match.group(4)
-                    peak_pos = (start + end) // 2
-
-                    pvalue = float(cols[pvalue_idx])
-                    fdr = float(cols[fdr_idx])
-                    fold_enrichment = float(cols[fold_idx])
-                    region = cols[region_idx]
-                    gene_id = cols[gene_idx]
-
-                    # 质量过滤
-                    if fdr > fdr_threshold:
-                        skipped_fdr += 1
-                        continue
-
-                    if fold_enrichment < fold_enrichment_threshold:
-                        skipped_enrichment += 1
-                        continue
-
-                    sites.append({
-                        'chrom': chrom,
-                        'start': start,
-                        'end': end,
-                        'peak_pos': peak_pos,
-                        'strand': strand,
-                        'pvalue': pvalue,
-                        'fdr': fdr,
-                        'fold_enrichment': fold_enrichment,
-                        'region': region,
-                        'gene_id': gene_id,
-                        'score': fold_enrichment
-                    })
-
-                except Exception as e:
-                    if line_num % 100000 == 0:
-                        print(f"处理到第 {line_num} 行...")
-                    continue
-
-        df = pd.DataFrame(sites)
-        print(f"\n解析完成:")
-        print(f"  - 有效位点: {len(df):,}")
-        print(f"  - FDR过滤: {skipped_fdr:,}")
-        print(f"  - Fold enrichment过滤: {skipped_enrichment:,}")
+        # 相同输入与过滤参数的解析结果缓存为Parquet，源文件未更新时直接读取
+        cache = self._parse_cache_path(gz_file, f'fdr{fdr_threshold}_fe{fold_enrichment_threshold}')
+        df = self._load_parse_cache(cache, gz_file)
+        if df is None:
+            if HAS_POLARS:
+                df, skipped_fdr, skipped_enrichment = self._read_repic_polars(
+                    gz_file, fdr_threshold, fold_enrichment_threshold)
+            else:
+                df, skipped_fdr, skipped_enrichment = self._read_repic_pandas(
+                    gz_file, fdr_threshold, fold_enrichment_threshold)
+
+            print(f"\n解析完成:")
+            print(f"  - 有效位点: {len(df):,}")
+            print(f"  - FDR过滤: {skipped_fdr:,}")
+            print(f"  - Fold enrichment过滤: {skipped_enrichment:,}")
+
+            self._save_parse_cache(df, cache)
 
         # 随机采样
         if len(df) > max_sites:
             print(f"\n位点数过多，进行随机采样:")
             print(f"  - 当前: {len(df):,}")
             print(f"  - 目标: {max_sites:,}")
-            df = df.sample(n=max_sites, random_state=42)
+            df = sample_sites(df, max_sites)
             print(f"  - 采样后: {len(df):,}")
 
         # 统计信息
-        print(f"\n染色体分布:")
-        for chrom, count in df['chrom'].value_counts().head(10).items():
-            print(f"  {chrom}: {count:,}")
+        if verbose:
+            _print_summary(df)
 
-        print(f"\n区域分布:")
-        for region, count in df['region'].value_counts().head(10).items():
-            print(f"  {region}: {count:,}")
+        return df
+
+    def _parse_cache_path(self, gz_file: str, tag: str) -> Path:
+        """解析缓存路径：results目录下以源文件名和过滤参数命名的Parquet文件"""
+        name = Path(gz_file).name.split('.')[0]
+        return self.results_dir / f"{name}.{tag}.parquet"
+
+    @staticmethod
+    def _load_parse_cache(cache: Path, gz_file: str):
+        """
+        读取解析缓存
 
+        返回：
+        - 缓存存在且比源文件新时返回DataFrame，否则返回None
+        """
+        if not (HAS_PYARROW and cache.exists()
+                and cache.stat().st_mtime > Path(gz_file).stat().st_mtime):
+            return None
+        df = pd.read_parquet(cache, engine='pyarrow')
+        print(f"\n读取解析缓存: {cache}")
+        print(f"  - 位点数: {len(df):,}")
         return df
 
+    @staticmethod
+    def _save_parse_cache(df: pd.DataFrame, cache: Path):
+        """写出解析缓存（未安装pyarrow或写入失败时跳过）"""
+        if not HAS_PYARROW:
+            return
+        try:
+            df.to_parquet(cache, engine='pyarrow', compression='zstd', index=False)
+        except OSError:
+            pass
+
+    @staticmethod
+    def _read_rmbase_polars(gz_file: str, n_header: int, min_support: int):
+        """
+        用polars读取RMBase表：解压、分列、类型转换和过滤都在Rust中多线程完成
+
+        返回：
+        - (位点DataFrame, 数据行数, 跳过的非编码位点数)
+        """
+        raw = pl.read_csv(gz_file, separator='\t', has_header=False, skip_rows=n_header,
+                          quote_char=None, infer_schema=False, truncate_ragged_lines=True,
+                          columns=RMBASE_USECOLS)
+        raw.columns = RMBASE_NAMES
+        # 缺失字段统一按空字符串处理（与pandas路径一致）
+        raw = raw.with_columns(pl.all().fill_null(''))
+
+        score = (pl.when(pl.col('score') == '.').then(pl.lit('0'))
+                 .otherwise(pl.col('score')).cast(pl.Float64, strict=False))
+        sites = raw.with_columns(
+            pl.col('start').cast(pl.Int64, strict=False),
+            pl.col('end').cast(pl.Int64, strict=False),
+            score.alias('score'),
+            # 非数字的支持数按1计
+            pl.when(pl.col('support_num').str.contains(r'^[0-9]+$'))
+            .then(pl.col('support_num').cast(pl.Int64, strict=False))
+            .otherwise(1).alias('support_num')
+        ).with_columns(
+            # 坐标或得分无法解析的行视为无效行
+            (pl.col('start').is_not_null() & pl.col('end').is_not_null()
+             & pl.col('score').is_not_null()).alias('valid'),
+            (pl.col('gene_type') == 'protein_coding').alias('coding')
+        )
+
+        skipped_non_coding = sites.select(
+            (pl.col('valid') & ~pl.col('coding')).sum()).item()
+        df = sites.filter(pl.col('valid') & pl.col('coding')
+                          & (pl.col('support_num') >= min_support))
+        df = df.select('chrom', 'start', 'end', 'site_id', 'score', 'strand',
+                       'gene_name', 'gene_type', 'region', 'support_num')
+        return df.to_pandas(), raw.height, skipped_non_coding
+
+    @staticmethod
+    def _read_rmbase_pandas(gz_file: str, n_header: int, min_support: int):
+        """
+        用pandas读取RMBase表（未安装polars时使用）
+
+        返回：
+        - (位点DataFrame, 数据行数, 跳过的非编码位点数)
+        """
+        # 解压交给open_gz，pandas只负责分列
+        with open_gz(gz_file) as f:
+            raw = pd.read_csv(f, sep='\t', header=None, skiprows=n_header,
+                              quoting=csv.QUOTE_NONE,
+                              usecols=RMBASE_USECOLS, names=range(max(RMBASE_USECOLS) + 2),
+                              dtype=str, keep_default_na=False)
+        raw.columns = RMBASE_NAMES
+        total_lines = len(raw)
+
+        # 坐标或得分无法解析的行视为无效行（列数不足的行对应字段为空字符串）
+        start = pd.to_numeric(raw['start'], errors='coerce')
+        end = pd.to_numeric(raw['end'], errors='coerce')
+        score = raw['score'].replace('.', '0')
+        score_ok = pd.to_numeric(score, errors='coerce').notna()
+        # 用astype做精确的字符串->浮点转换（to_numeric的快速解析可能差1个ulp）
+        score = score.where(score_ok, 'nan').astype(np.float64)
+        valid = (start.notna() & end.notna() & score_ok).to_numpy()
+
+        # 只保留protein-coding基因
+        coding = (raw['gene_type'] == 'protein_coding').to_numpy()
+        skipped_non_coding = int((valid & ~coding).sum())
+
+        # 过滤支持数（非数字的支持数按1计）
+        support = raw['support_num']
+        support_num = pd.to_numeric(support.where(support.str.isdigit() == True),
+                                    errors='coerce').fillna(1).to_numpy(dtype=np.int64)
+        keep = valid & coding & (support_num >= min_support)
+
+        df = pd.DataFrame({
+            'chrom': raw['chrom'].to_numpy()[keep],
+            'start': start.to_numpy()[keep].astype(np.int64),
+            'end': end.to_numpy()[keep].astype(np.int64),
+            'site_id': raw['site_id'].to_numpy()[keep],
+            'score': score.to_numpy()[keep],
+            'strand': raw['strand'].to_numpy()[keep],
+            'gene_name': raw['gene_name'].to_numpy()[keep],
+            'gene_type': raw['gene_type'].to_numpy()[keep],
+            'region': raw['region'].to_numpy()[keep],
+            'support_num': support_num[keep]
+        })
+
+        return df, total_lines, skipped_non_coding
+
+    @staticmethod
+    def _read_repic_polars(gz_file: str, fdr_threshold: float,
+                           fold_enrichment_threshold: float):
+        """
+        用polars读取REPIC表：位置解析和质量过滤都在Rust中多线程完成
+
+        返回：
+        - (位点DataFrame, FDR过滤数, Fold enrichment过滤数)
+        """
+        raw = pl.read_csv(gz_file, separator='\t', quote_char=None, infer_schema=False,
+                          truncate_ragged_lines=True, columns=REPIC_COLUMNS)
+        # 缺失字段统一按空字符串处理（与pandas路径一致）
+        raw = raw.with_columns(pl.all().fill_null(''))
+
+        # 解析位置: chr1:629848-630037[+]
+        sites = raw.with_columns(
+            pl.col('pos').str.extract_groups(POS_RE.pattern).alias('p'),
+            pl.col('pvalue').cast(pl.Float64, strict=False),
+            pl.col('fdr').cast(pl.Float64, strict=False),
+            pl.col('fold_enrichment').cast(pl.Float64, strict=False)
+        ).unnest('p').filter(
+            # geneid为末列：缺少该字段的行即列数不足的行，按无效行处理
+            pl.col('chrom').is_not_null() & (pl.col('geneid') != '')
+            & pl.col('pvalue').is_not_null() & pl.col('fdr').is_not_null()
+            & pl.col('fold_enrichment').is_not_null()
+        )
+
+        # 质量过滤
+        fdr_fail = pl.col('fdr') > fdr_threshold
+        enrichment_fail = ~fdr_fail & (pl.col('fold_enrichment') < fold_enrichment_threshold)
+        skipped_fdr, skipped_enrichment = sites.select(
+            fdr_fail.sum().alias('fdr_fail'),
+            enrichment_fail.sum().alias('enrichment_fail')).row(0)
+
+        df = sites.filter(~(fdr_fail | enrichment_fail)).select(
+            'chrom',
+            pl.col('start').cast(pl.Int64),
+            pl.col('end').cast(pl.Int64),
+            ((pl.col('start').cast(pl.Int64) + pl.col('end').cast(pl.Int64)) // 2).alias('peak_pos'),
+            'strand', 'pvalue', 'fdr', 'fold_enrichment', 'region',
+            pl.col('geneid').alias('gene_id'),
+            pl.col('fold_enrichment').alias('score')
+        )
+        return df.to_pandas(), skipped_fdr, skipped_enrichment
+
+    @staticmethod
+    def _read_repic_pandas(gz_file: str, fdr_threshold: float,
+                           fold_enrichment_threshold: float):
+        """
+        用pandas读取REPIC表（未安装polars时使用）
+
+        返回：
+        - (位点DataFrame, FDR过滤数, Fold enrichment过滤数)
+        """
+        # 一次性读取所需列（解压和分列都在C中完成）
+        # geneid为末列：缺少该字段的行即列数不足的行，按无效行处理
+        with open_gz(gz_file) as f:
+            raw = pd.read_csv(f, sep='\t', quoting=csv.QUOTE_NONE,
+                              usecols=REPIC_COLUMNS, dtype=str,
+                              keep_default_na=False, na_values={'geneid': ['']})
+
+        # 解析位置: chr1:629848-630037[+]
+        parts = raw['pos'].str.extract(POS_RE)
+        numeric = raw[['pvalue', 'fdr', 'fold_enrichment']]
+        valid = (parts['chrom'].notna() & raw['geneid'].notna()
+                 & numeric.apply(pd.to_numeric, errors='coerce').notna().all(axis=1)).to_numpy()
+        raw, parts = raw[valid], parts[valid]
+        # 用astype做精确的字符串->浮点转换
+        fdr = raw['fdr'].astype(np.float64).to_numpy()
+        fold_enrichment = raw['fold_enrichment'].astype(np.float64).to_numpy()
+
+        # 质量过滤
+        fdr_fail = fdr > fdr_threshold
+        enrichment_fail = ~fdr_fail & (fold_enrichment < fold_enrichment_threshold)
+        skipped_fdr = int(fdr_fail.sum())
+        skipped_enrichment = int(enrichment_fail.sum())
+        keep = ~(fdr_fail | enrichment_fail)
+
+        start = parts['start'].to_numpy()[keep].astype(np.int64)
+        end = parts['end'].to_numpy()[keep].astype(np.int64)
+        df = pd.DataFrame({
+            'chrom': parts['chrom'].to_numpy()[keep],
+            'start': start,
+            'end': end,
+            'peak_pos': (start + end) // 2,
+            'strand': parts['strand'].to_numpy()[keep],
+            'pvalue': raw['pvalue'].astype(np.float64).to_numpy()[keep],
+            'fdr': fdr[keep],
+            'fold_enrichment': fold_enrichment[keep],
+            'region': raw['region'].to_numpy()[keep],
+            'gene_id': raw['geneid'].to_numpy()[keep],
+            'score': fold_enrichment[keep]
+        })
+
+        return df, skipped_fdr, skipped_enrichment
+
     def normalize_chrom_names(self, df: pd.DataFrame) -> pd.DataFrame:
-        """标准化染色体名称"""
-        df = df.copy()
-        df['chrom'] = df['chrom'].str.replace('chr', '')
-        return df
+        """
+        标准化染色体名称
+
+        染色体列转为分类类型后只对类别（几十个不同的名称）去掉"chr"，不逐行处理字符串；
+        不复制整张表，只替换chrom列
+        """
+        chrom = df['chrom'].astype('category')
+        return df.assign(chrom=chrom.map(_norm_chrom))
 
     def save_bed_format(self, df: pd.DataFrame, output_file: str,
                        mod_type: str):
@@ -243,67 +451,86 @@ class RealDataParser:
         """
         print(f"\n保存{mod_type}数据到: {output_file}")
 
-        bed_df = df.copy()
-
-        # 创建name列
-        if 'gene_name' in bed_df.columns:
-            bed_df['name'] = bed_df['gene_name'] + '_' + bed_df['region']
-        elif 'gene_id' in bed_df.columns:
-            bed_df['name'] = bed_df['gene_id'] + '_' + bed_df['region']
+        # 创建name列（不复制整张表，只生成新列；其余列直接引用原数据）
+        if 'gene_name' in df.columns:
+            name = df['gene_name'] + '_' + df['region']
+        elif 'gene_id' in df.columns:
+            name = df['gene_id'] + '_' + df['region']
         else:
-            bed_df['name'] = bed_df.get('site_id', [f'{i}' for i in range(len(bed_df))])
+            name = df.get('site_id', [f'{i}' for i in range(len(df))])
 
         # BED6格式: chrom start end name score strand
-        bed_df[['chrom', 'start', 'end', 'name', 'score', 'strand']].to_csv(
-            output_file, sep='\t', header=False, index=False
-        )
+        bed_df = pd.DataFrame({'chrom': df['chrom'], 'start': df['start'], 'end': df['end'],
+                               'name': name, 'score': df['score'], 'strand': df['strand']},
+                              copy=False)
+        write_bed(bed_df, output_file)
 
         print(f"已保存 {len(bed_df)} 个位点")
 
 
+def _run_psi(project_dir: Path):
+    """解析并保存Ψ数据 (RMBase, hg19)；在子进程中运行"""
+    parser = RealDataParser(project_dir)
+    psi_gz = parser.project_dir / "RMBase_hg19_all_PseudoU_site.txt.gz"
+    if not psi_gz.exists():
+        return
+
+    psi_df = parser.parse_psi_rmbase(
+        str(psi_gz),
+        min_support=1,
+        max_sites=999999,  # 获取所有位点
+        verbose=True
+    )
+
+    # 保存
+    psi_bed = parser.data_dir / "psi_real_hg19.bed"
+    parser.save_bed_format(psi_df, str(psi_bed), "Ψ")
+
+    psi_csv = parser.results_dir / "psi_real_full.csv"
+    save_cached(psi_df, psi_csv)
+    print(f"详细信息: {psi_csv}")
+
+
+def _run_m6a(project_dir: Path):
+    """解析并保存m6A数据 (REPIC, hg38)；在子进程中运行"""
+    parser = RealDataParser(project_dir)
+    m6a_gz = parser.project_dir / "m6A=sites=cell=human=hg38=HEK293T.txt.gz"
+    if not m6a_gz.exists():
+        return
+
+    m6a_df = parser.parse_m6a_repic(
+        str(m6a_gz),
+        fdr_threshold=0.01,
+        fold_enrichment_threshold=10.0,
+        max_sites=10000,
+        verbose=True
+    )
+
+    # 保存
+    m6a_bed = parser.data_dir / "m6A_real_hg38.bed"
+    parser.save_bed_format(m6a_df, str(m6a_bed), "m6A")
+
+    m6a_csv = parser.results_dir / "m6a_real_full.csv"
+    save_cached(m6a_df, m6a_csv)
+    print(f"详细信息: {m6a_csv}")
+
+
 def main():
     """主函数"""
     project_dir = Path("/home/tony/m6A/RNA_modification_analysis")
-    parser = RealDataParser(project_dir)
 
     print("="*70)
     print("解析真实RNA修饰数据")
     print("="*70)
 
-    # 1. 解析Ψ数据 (RMBase, hg19)
-    psi_gz = project_dir / "RMBase_hg19_all_PseudoU_site.txt.gz"
-    if psi_gz.exists():
-        psi_df = parser.parse_psi_rmbase(
-            str(psi_gz),
-            min_support=1,
-            max_sites=999999  # 获取所有位点
-        )
-
-        # 保存
-        psi_bed = parser.data_dir / "psi_real_hg19.bed"
-        parser.save_bed_format(psi_df, str(psi_bed), "Ψ")
-
-        psi_csv = parser.results_dir / "psi_real_full.csv"
-        psi_df.to_csv(psi_csv, index=False)
-        print(f"详细信息: {psi_csv}")
-
-    # 2. 解析m6A数据 (REPIC, hg38)
-    m6a_gz = project_dir / "m6A=sites=cell=human=hg38=HEK293T.txt.gz"
-    if m6a_gz.exists():
-        m6a_df = parser.parse_m6a_repic(
-            str(m6a_gz),
-            fdr_threshold=0.01,
-            fold_enrichment_threshold=10.0,
-            max_sites=10000
-        )
-
-        # 保存
-        m6a_bed = parser.data_dir / "m6A_real_hg38.bed"
-        parser.save_bed_format(m6a_df, str(m6a_bed), "m6A")
-
-        m6a_csv = parser.results_dir / "m6a_real_full.csv"
-        m6a_df.to_csv(m6a_csv, index=False)
-        print(f"详细信息: {m6a_csv}")
+    # Ψ (RMBase, hg19) 与 m6A (REPIC, hg38) 的输入输出互不相关，在两个子进程中并行解析；
+    # 与analyze_real_data一致用spawn启动，子进程不继承父进程的线程池/锁状态
+    with ProcessPoolExecutor(max_workers=2,
+                             mp_context=multiprocessing.get_context('spawn')) as executor:
+        futures = [executor.submit(_run_psi, project_dir),
+                   executor.submit(_run_m6a, project_dir)]
+        for future in as_completed(futures):
+            future.result()
 
     print("\n" + "="*70)
     print("数据解析完成！")
@@ -10,6 +10,8 @@ import pandas as pd
 import numpy as np
 from pathlib import Path
 
+from site_io import read_bed
+
 class M6ADataProcessor:
     def __init__(self, project_dir: Path):
         self.project_dir = Path(project_dir)
@@ -36,8 +38,7 @@ class M6ADataProcessor:
 
         # 读取BED文件
         print(f"\n读取数据...")
-        df = pd.read_csv(bed_file, sep='\t', header=None,
-                        names=['chrom', 'start', 'end', 'name', 'score', 'strand'])
+        df = read_bed(bed_file)
 
         print(f"原始位点数: {len(df):,}")
 
@@ -93,8 +94,8 @@ class M6ADataProcessor:
         """保存处理后的数据"""
         print(f"\n保存处理后的数据到: {output_file}")
 
-        # 保存BED6格式
-        bed_df = df[['chrom', 'start', 'end', 'name', 'score', 'strand']].copy()
+        # 保存BED6格式（选列后直接写出，无需再复制）
+        bed_df = df[['chrom', 'start', 'end', 'name', 'score', 'strand']]
         bed_df.to_csv(output_file, sep='\t', header=False, index=False)
 
         print(f"已保存 {len(bed_df)} 个位点")
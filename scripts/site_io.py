@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+位点数据读写的共用函数与常量（多个分析脚本共用）
+
+本模块导入时没有副作用：不配置日志、不修改matplotlib设置
+"""
+
+from pathlib import Path
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pcsv
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+# 标准染色体顺序（按自然编号，而非字符串字典序）
+CHROM_ORDER = [f'chr{i}' for i in range(1, 23)] + ['chrX', 'chrY', 'chrM']
+
+# BED6列名
+BED6_COLUMNS = ['chrom', 'start', 'end', 'name', 'score', 'strand']
+
+
+def load_cached(csv_path: Path) -> pd.DataFrame:
+    """
+    读取CSV并缓存为同名Parquet文件，之后的运行直接读取缓存
+
+    参数：
+        csv_path: CSV文件路径
+    返回：
+        DataFrame
+    """
+    csv_path = Path(csv_path)
+    if not HAS_PYARROW:
+        return pd.read_csv(csv_path)
+
+    parquet_path = csv_path.with_suffix('.parquet')
+    # 缓存比CSV旧时重新解析，避免读到过期数据
+    if parquet_path.exists() and parquet_path.stat().st_mtime >= csv_path.stat().st_mtime:
+        return pd.read_parquet(parquet_path, engine='pyarrow')
+
+    df = pd.read_csv(csv_path, engine='pyarrow')
+    try:
+        df.to_parquet(parquet_path, engine='pyarrow', compression='zstd', index=False)
+    except OSError:
+        pass
+    return df
+
+
+def save_cached(df: pd.DataFrame, csv_path: Path):
+    """
+    写出CSV，并同时写出load_cached使用的同名Parquet缓存
+
+    参数：
+        df: 要保存的DataFrame
+        csv_path: CSV文件路径
+    """
+    csv_path = Path(csv_path)
+    df.to_csv(csv_path, index=False)
+    if not HAS_PYARROW:
+        return
+
+    # 在CSV之后写出，保证缓存不比CSV旧
+    try:
+        df.to_parquet(csv_path.with_suffix('.parquet'), engine='pyarrow',
+                      compression='zstd', index=False)
+    except OSError:
+        pass
+
+
+def write_bed(bed_data, output_file):
+    """
+    写出BED文件（无表头，制表符分隔）
+
+    安装了pyarrow时使用其多线程CSV写出器，否则退回pandas.to_csv
+    """
+    if HAS_PYARROW:
+        table = pa.Table.from_pandas(bed_data, preserve_index=False)
+        pcsv.write_csv(table, str(output_file),
+                       write_options=pcsv.WriteOptions(include_header=False,
+                                                       delimiter='\t',
+                                                       quoting_style='none'))
+    else:
+        bed_data.to_csv(output_file, sep='\t', header=False, index=False)
+
+
+def read_bed(bed_file) -> pd.DataFrame:
+    """
+    读取BED6文件（无表头，制表符分隔）
+
+    安装了pyarrow时用内存映射加多线程CSV读取器解析，否则退回pandas.read_csv；
+    chrom/strand保持普通字符串列（与字符串键表合并时分类列反而更慢）
+
+    参数：
+        bed_file: BED文件路径
+    返回：
+        DataFrame
+    """
+    if not HAS_PYARROW:
+        return pd.read_csv(bed_file, sep='\t', header=None, names=BED6_COLUMNS)
+
+    with pa.memory_map(str(bed_file)) as source:
+        table = pcsv.read_csv(
+            source,
+            read_options=pcsv.ReadOptions(column_names=BED6_COLUMNS),
+            parse_options=pcsv.ParseOptions(delimiter='\t', quote_char=False),
+            convert_options=pcsv.ConvertOptions(column_types={
+                'chrom': pa.string(), 'start': pa.int64(), 'end': pa.int64(),
+                'name': pa.string(), 'score': pa.float64(), 'strand': pa.string()}))
+    return table.to_pandas()
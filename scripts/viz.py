@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+共用绘图函数（4_venn_analysis.py 与 analyze_real_data.py 共用）
+
+本模块导入时不修改matplotlib后端、rcParams或日志配置，由调用脚本自行设置
+"""
+
+import logging
+import matplotlib.pyplot as plt
+from matplotlib_venn import venn2, venn2_circles
+
+logger = logging.getLogger(__name__)
+
+
+def plot_venn_diagram(psi_only: int, m6a_only: int, overlap: int,
+                     output_file: str = None):
+    """
+    绘制韦恩图
+
+    参数：
+    - psi_only: 仅Ψ的位点数
+    - m6a_only: 仅m6A的位点数
+    - overlap: 共定位位点数
+    - output_file: 输出文件路径
+    """
+    fig = plt.figure(figsize=(10, 8))
+
+    # 创建子图
+    subset = (psi_only, m6a_only, overlap)
+
+    # 绘制韦恩图
+    v = venn2(subsets=subset, set_labels=('Pseudouridine (Ψ)', 'm6A'),
+             set_colors=('#3498db', '#e74c3c'), alpha=0.6)
+
+    # 自定义样式
+    if v:
+        # 设置标签字体
+        for text in v.set_labels:
+            text.set_fontsize(14)
+            text.set_fontweight('bold')
+
+        # 设置区域数字
+        for text in v.subset_labels:
+            if text:
+                text.set_fontsize(16)
+                text.set_fontweight('bold')
+
+    # 添加圆圈边框
+    venn2_circles(subsets=subset, linestyle='dashed', linewidth=2)
+
+    # 添加标题和统计信息
+    total_psi = psi_only + overlap
+    total_m6a = m6a_only + overlap
+
+    plt.title(f'Colocalization Analysis: Ψ vs m6A\n'
+             f'Total Ψ: {total_psi:,} | Total m6A: {total_m6a:,} | Overlap: {overlap:,} '
+             f'({overlap/max(total_psi, total_m6a)*100:.1f}% of Ψ sites)',
+             fontsize=14, fontweight='bold', pad=20)
+
+    fig.tight_layout()
+
+    if output_file:
+        fig.savefig(output_file, dpi=300, bbox_inches='tight')
+        logger.info(f"保存韦恩图: {output_file}")
+    else:
+        plt.show()
+
+    plt.close(fig)